@@ -0,0 +1,157 @@
+from limits import WorkCounter
+
+
+# the number of propagation passes of a node without the controller
+MAX_PROPAGATION_PASSES = 10
+
+
+class AdaptiveController:
+    # The cost and the effect of the propagation and of the conflict cuts are measured
+    # over windows of nodes. The costs are counted in row visits, a propagation pass
+    # and an LP iteration visit every row once and the conflict analysis visits the
+    # nodes and edges of the graph, so the decisions are the same in every run. At
+    # the end of a window a component whose share of the work is large while it
+    # tightens little is turned down or off; the propagation gets more passes back
+    # while its last pass still tightens. A component that is off is turned on again
+    # after probe_interval windows to measure it once more.
+    def __init__(self,
+                 fuip_size: int = 1,
+                 work: WorkCounter | None = None,
+                 window: int = 50,
+                 probe_interval: int = 4,
+                 max_work_share: float = 0.3,
+                 min_tightenings_per_pass: float = 1.0,
+                 min_uses_per_cut: float = 0.5,
+                 max_fuip_size: int = 8) -> None:
+        self.work = work if work is not None else WorkCounter()
+        self.window = window
+        self.probe_interval = probe_interval
+        self.max_work_share = max_work_share
+        self.min_tightenings_per_pass = min_tightenings_per_pass
+        self.min_uses_per_cut = min_uses_per_cut
+        self.max_fuip_size = max_fuip_size
+
+        self.propagation_passes = MAX_PROPAGATION_PASSES
+        self.cutting = True
+        self.fuip_size = fuip_size
+        # the settings chosen at the end of every window
+        self.history: list[tuple[int, str, int | bool]] = []
+
+        self.__number_of_nodes = 0
+        self.__number_of_rows = 1
+        self.__windows_without_propagation = 0
+        self.__windows_without_cutting = 0
+        self.__reset_window()
+
+    def __reset_window(self) -> None:
+        self.__window_lp_iterations = self.work.lp_iterations
+        self.__window_nodes = 0
+        self.__propagation_work = 0
+        self.__number_of_passes = 0
+        self.__number_of_tightenings = 0
+        self.__number_of_capped_propagations = 0
+        self.__number_of_cut_uses = 0
+        self.__conflict_work = 0
+        self.__number_of_cuts = 0
+
+    def on_propagation(self, number_of_rows: int, number_of_passes: int, number_of_tightenings: int,
+                       number_of_cut_uses: int, is_capped: bool) -> None:
+        self.__number_of_rows = max(number_of_rows, 1)
+        self.__propagation_work += number_of_passes * number_of_rows
+        self.__number_of_passes += number_of_passes
+        self.__number_of_tightenings += number_of_tightenings
+        self.__number_of_cut_uses += number_of_cut_uses
+        self.__number_of_capped_propagations += is_capped
+
+    def on_conflict(self, graph_size: int, number_of_cuts: int) -> None:
+        self.__conflict_work += graph_size
+        self.__number_of_cuts += number_of_cuts
+
+    def on_node(self) -> None:
+        self.__number_of_nodes += 1
+        self.__window_nodes += 1
+        if self.__window_nodes >= self.window:
+            self.__update()
+            self.__reset_window()
+
+    def __update(self) -> None:
+        lp_work = (self.work.lp_iterations - self.__window_lp_iterations) * self.__number_of_rows
+        window_work = max(lp_work + self.__propagation_work + self.__conflict_work, 1)
+
+        if self.propagation_passes == 0:
+            self.__windows_without_propagation += 1
+            if self.__windows_without_propagation >= self.probe_interval:
+                self.__set("propagation_passes", 1)
+        else:
+            tightenings_per_pass = self.__number_of_tightenings / \
+                max(self.__number_of_passes, 1)
+            if self.__propagation_work / window_work > self.max_work_share and \
+                    tightenings_per_pass < self.min_tightenings_per_pass:
+                self.__set("propagation_passes", self.propagation_passes // 2)
+            elif self.__number_of_capped_propagations > 0 and self.propagation_passes < MAX_PROPAGATION_PASSES:
+                self.__set("propagation_passes", min(
+                    2 * self.propagation_passes, MAX_PROPAGATION_PASSES))
+
+        if not self.cutting:
+            self.__windows_without_cutting += 1
+            if self.__windows_without_cutting >= self.probe_interval:
+                self.__set("cutting", True)
+        elif self.__number_of_cuts > 0 and self.__conflict_work / window_work > self.max_work_share:
+            # the cuts pay for their analysis only if the propagation uses them
+            if self.__number_of_cut_uses / self.__number_of_cuts < self.min_uses_per_cut:
+                self.__set("cutting", False)
+            elif self.fuip_size < self.max_fuip_size:
+                # a larger group stops the analysis nearer to the conflict
+                self.__set("fuip_size", self.fuip_size + 1)
+
+    def __set(self, name: str, value: int | bool) -> None:
+        if name == "propagation_passes" and value == 0:
+            self.__windows_without_propagation = 0
+        if name == "cutting" and not value:
+            self.__windows_without_cutting = 0
+        setattr(self, name, value)
+        self.history.append((self.__number_of_nodes, name, value))
+
+    def state(self) -> dict:
+        # the settings and the counters of the current window, a resumed search
+        # continues with the same decisions
+        return {
+            "propagation_passes": self.propagation_passes,
+            "cutting": self.cutting,
+            "fuip_size": self.fuip_size,
+            "history": self.history,
+            "number_of_nodes": self.__number_of_nodes,
+            "number_of_rows": self.__number_of_rows,
+            "windows_without_propagation": self.__windows_without_propagation,
+            "windows_without_cutting": self.__windows_without_cutting,
+            "window": [self.__window_lp_iterations, self.__window_nodes, self.__propagation_work,
+                       self.__number_of_passes, self.__number_of_tightenings,
+                       self.__number_of_capped_propagations, self.__number_of_cut_uses,
+                       self.__conflict_work, self.__number_of_cuts],
+        }
+
+    def load_state(self, state: dict) -> None:
+        self.propagation_passes = state["propagation_passes"]
+        self.cutting = state["cutting"]
+        self.fuip_size = state["fuip_size"]
+        self.history = [tuple(change) for change in state["history"]]
+        self.__number_of_nodes = state["number_of_nodes"]
+        self.__number_of_rows = state["number_of_rows"]
+        self.__windows_without_propagation = state["windows_without_propagation"]
+        self.__windows_without_cutting = state["windows_without_cutting"]
+        (self.__window_lp_iterations, self.__window_nodes, self.__propagation_work,
+         self.__number_of_passes, self.__number_of_tightenings,
+         self.__number_of_capped_propagations, self.__number_of_cut_uses,
+         self.__conflict_work, self.__number_of_cuts) = state["window"]
+
+    def to_dict(self) -> dict:
+        return {
+            "propagation_passes": self.propagation_passes,
+            "cutting": self.cutting,
+            "fuip_size": self.fuip_size,
+            "changes": len(self.history),
+        }
+
+    def __repr__(self, tabs: int = 0):
+        return "\t" * tabs + f"AdaptiveController {{propagation passes: {self.propagation_passes}, " + \
+            f"cutting: {self.cutting}, fuip size: {self.fuip_size}, changes: {len(self.history)}" + "}"
@@ -0,0 +1,123 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+from contextlib import nullcontext
+from multiprocessing.connection import wait
+from time import perf_counter
+from typing import Iterator
+
+from solver_args import add_solver_arguments, solver_kwargs
+
+
+def run_solver(problem: str, kwargs: dict) -> dict:
+    from solver import Solver
+
+    start_time = perf_counter()
+    sl = Solver(path_to_problem=problem, **kwargs)
+    sl.solve()
+    record = sl.result().to_dict()
+    record["wall_time"] = perf_counter() - start_time
+    if record["phases"] is not None:
+        record["lp_solves"] = record["phases"]["lp_solve"]["count"]
+    return record
+
+
+# the options naming an output of one solve, every instance gets its own file
+PATH_OPTIONS = ["checkpoint_path", "trace_path", "graph_record_path", "certificate_path"]
+
+
+def instance_path(path: str, problem: str) -> str:
+    root, extension = os.path.splitext(path)
+    stem = os.path.splitext(os.path.basename(problem))[0]
+    return f"{root}.{stem}{extension}"
+
+
+def instance_kwargs(problem: str, kwargs: dict) -> dict:
+    return {**kwargs, **{name: instance_path(kwargs[name], problem)
+                         for name in PATH_OPTIONS if kwargs.get(name) is not None}}
+
+
+def solve_instance(task: tuple[str, dict]) -> dict:
+    problem, kwargs = task
+    record = {"instance": problem}
+    try:
+        record.update(run_solver(problem, kwargs))
+    except Exception:
+        record["error"] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+    return record
+
+
+def send_instance(task: tuple[str, dict], connection) -> None:
+    connection.send(solve_instance(task))
+    connection.close()
+
+
+def solve_batch(problems: list[str], workers: int | None = None, task_timeout: float | None = None,
+                **kwargs) -> Iterator[dict]:
+    # the workers are forked after the solver modules are imported, so no instance
+    # pays for the interpreter startup and the highspy import; every instance has
+    # its own process, so one hung in highs is killed at its timeout
+    import solver  # noqa: F401
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    workers = workers or os.cpu_count() or 1
+    pending = list(reversed(problems))
+    running: dict = {}
+    while pending or running:
+        while pending and len(running) < workers:
+            problem = pending.pop()
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=send_instance,
+                                      args=((problem, instance_kwargs(problem, kwargs)), sender))
+            process.start()
+            sender.close()
+            deadline = None if task_timeout is None else perf_counter() + task_timeout
+            running[receiver] = (problem, process, deadline)
+
+        deadlines = [deadline for _, _, deadline in running.values() if deadline is not None]
+        timeout = None if not deadlines else max(0.0, min(deadlines) - perf_counter())
+        for receiver in wait(list(running), timeout):
+            problem, process, _ = running.pop(receiver)
+            try:
+                record = receiver.recv()
+            except EOFError:
+                record = {"instance": problem, "error": f"worker exited with code {process.exitcode}"}
+            receiver.close()
+            process.join()
+            yield record
+
+        for receiver, (problem, process, deadline) in list(running.items()):
+            if deadline is not None and perf_counter() >= deadline:
+                process.kill()
+                process.join()
+                receiver.close()
+                del running[receiver]
+                yield {"instance": problem, "error": f"timeout after {task_timeout}s"}
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("problems", type=str, nargs="+",
+                        help="Paths or glob patterns of problems.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes. (default = number of CPUs)")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Path to the JSON lines file with the results. (default = stdout)")
+    parser.add_argument("--task-grace", type=float, default=60.0,
+                        help="Seconds over the time limit after which an instance is killed. (default = `60`)")
+    add_solver_arguments(parser)
+    args = parser.parse_args()
+
+    problems = sorted({path for pattern in args.problems
+                       for path in glob.glob(pattern)})
+    task_timeout = None if args.time_limit is None else args.time_limit + args.task_grace
+    with nullcontext(sys.stdout) if args.output is None else open(args.output, "w") as output:
+        for record in solve_batch(problems, args.workers, task_timeout, **solver_kwargs(args)):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
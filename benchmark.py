@@ -0,0 +1,244 @@
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import sys
+import traceback
+from time import perf_counter
+
+from batch import run_solver
+from limits import peak_memory
+from solver_args import CUTTING_MODS, add_solver_arguments, solver_kwargs
+
+
+def run_highs(problem: str, time_limit: float | None) -> dict:
+    from highspy import Highs
+
+    start_time = perf_counter()
+    h = Highs()
+    h.silent()
+    if time_limit is not None:
+        h.setOptionValue("time_limit", time_limit)
+    h.readModel(problem)
+    h.run()
+    info = h.getInfo()
+    return {
+        "state": h.modelStatusToString(h.getModelStatus()),
+        "primal": info.objective_function_value,
+        "dual": info.mip_dual_bound,
+        "gap": info.mip_gap,
+        "nodes": info.mip_node_count,
+        "wall_time": perf_counter() - start_time,
+    }
+
+
+def memory_per_root_child(problem: str, kwargs: dict, number_of_nodes: int = 20) -> dict:
+    # the traced python objects of copies of the root branched on its first
+    # candidate, not of the open nodes of a search, whose graphs and rows grow with
+    # the depth; the copy of the model inside highs is not seen by tracemalloc
+    import tracemalloc
+    from extended_highs_model import ExtendedHighsModel
+
+    root = ExtendedHighsModel(kwargs["with_presolve"], kwargs["cutting_mod"], kwargs["fuip_size"],
+                              problem, backend=kwargs["backend"])
+    root.solve()
+    record = {"instance": problem, "vars": len(root.vars), "rows": len(root.constraints)}
+    if not root.solution.is_feasible() or root.solution.is_primal:
+        return record
+
+    branch = root.solution.find_bnb_branch()
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    nodes = []
+    for node_idx in range(number_of_nodes):
+        bound = branch.left_bound if node_idx % 2 == 0 else branch.right_bound
+        exh = root.copy()
+        exh.change_var_bounds(exh.vars[branch.var.index], bound.lower, bound.upper)
+        exh.solve(branch.var)
+        nodes.append(exh)
+    record["bytes_per_root_child"] = (tracemalloc.get_traced_memory()[0] - start_memory) / number_of_nodes
+    tracemalloc.stop()
+    return record
+
+
+def run_memory_task(task: tuple[str, str, dict]) -> dict:
+    problem, _, kwargs = task
+    try:
+        return memory_per_root_child(problem, kwargs)
+    except Exception:
+        return {"instance": problem, "error": traceback.format_exc(limit=1).strip().splitlines()[-1]}
+
+
+def run_task(task: tuple[str, str, dict]) -> dict:
+    problem, mode, kwargs = task
+    record = {"instance": problem, "mode": mode}
+    try:
+        if mode == "highs":
+            record.update(run_highs(problem, kwargs["time_limit"]))
+        else:
+            record.update(run_solver(problem, kwargs))
+    except Exception:
+        record["error"] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+    record["peak_rss"] = peak_memory()
+    return record
+
+
+def flatten(record: dict, prefix: str = "") -> dict:
+    result = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            result.update(flatten(value, prefix + key + "."))
+        else:
+            result[prefix + key] = value
+    return result
+
+
+def compare(records: list[dict], baseline: list[dict], time_tolerance: float, min_time_diff: float) -> list[str]:
+    baseline_by_key = {(record["instance"], record["mode"]): record
+                       for record in baseline}
+    regressions = []
+    for record in records:
+        base = baseline_by_key.get((record["instance"], record["mode"]))
+        if base is None:
+            continue
+        name = f"{record['instance']} [{record['mode']}]"
+        if "error" in record and "error" not in base:
+            regressions.append(f"{name}: fails with {record['error']}")
+            continue
+        if record.get("state") != base.get("state"):
+            regressions.append(
+                f"{name}: state {base.get('state')} -> {record.get('state')}")
+        if "wall_time" in record and "wall_time" in base and \
+                record["wall_time"] > base["wall_time"] * (1 + time_tolerance) and \
+                record["wall_time"] - base["wall_time"] > min_time_diff:
+            regressions.append(
+                f"{name}: wall time {base['wall_time']:.3f}s -> {record['wall_time']:.3f}s")
+        if record.get("nodes") is not None and base.get("nodes") is not None and \
+                record.get("state") == base.get("state") != "LimitReached" and record["nodes"] > base["nodes"]:
+            regressions.append(
+                f"{name}: nodes {base['nodes']} -> {record['nodes']}")
+    return regressions
+
+
+def reproducibility(records: list[dict]) -> list[dict]:
+    # the runs of one instance and mode are reproducible if they end with the same
+    # state, number of nodes and primal value
+    groups: dict[tuple[str, str], list[dict]] = {}
+    for record in records:
+        groups.setdefault((record["instance"], record["mode"]), []).append(record)
+
+    summary = []
+    for (instance, mode), runs in groups.items():
+        times = [run["wall_time"] for run in runs if "wall_time" in run]
+        summary.append({
+            "instance": instance,
+            "mode": mode,
+            "runs": len(runs),
+            "outcomes": len({(run.get("state"), run.get("nodes"), run.get("primal")) for run in runs}),
+            "mean_time": sum(times) / len(times) if times else None,
+        })
+    return summary
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("problems", type=str, nargs="*", default=["problems/*"],
+                        help="Paths or glob patterns of problems. (default = `problems/*`)")
+    parser.add_argument("--modes", type=str, nargs="+", default=list(CUTTING_MODS) + ["highs"],
+                        choices=list(CUTTING_MODS) + ["highs"],
+                        help="Cutting modes of the custom solver and `highs` for the reference run. (default = all)")
+    parser.add_argument("--repeats", type=int, default=1,
+                        help="Number of runs of every instance and mode. (default = `1`)")
+    parser.add_argument("--compare-determinism", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable running the solver modes both deterministic and not. (default = `disable`)")
+    parser.add_argument("--memory-per-node", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable measuring only the traced bytes of a branched copy of the root instead of solving. (default = `disable`)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of benchmark processes. (default = `1`)")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Path to the JSON file with the results. (default = `None`)")
+    parser.add_argument("--csv", type=str, default=None,
+                        help="Path to the CSV file with the results. (default = `None`)")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Path to the JSON baseline to compare with. (default = `None`)")
+    parser.add_argument("--time-tolerance", type=float, default=0.2,
+                        help="Relative wall time increase reported as a regression. (default = `0.2`)")
+    parser.add_argument("--min-time-diff", type=float, default=0.1,
+                        help="Wall time increase in seconds below which no regression is reported. (default = `0.1`)")
+    add_solver_arguments(parser)
+    parser.set_defaults(time_limit=60.0, profile="enable")
+    args = parser.parse_args()
+
+    problems = sorted({path for pattern in args.problems
+                       for path in glob.glob(pattern)})
+    tasks = []
+    for problem in problems:
+        for mode in args.modes:
+            variants = [(mode, args.deterministic)]
+            if args.compare_determinism == "enable" and mode != "highs":
+                variants = [(mode + "/deterministic", "enable"),
+                            (mode + "/opportunistic", "disable")]
+            for name, deterministic in variants:
+                # every task gets its own copy, so no setting leaks into the next one
+                task_args = argparse.Namespace(**vars(args))
+                task_args.cutting = "fuip" if mode == "highs" else mode
+                task_args.deterministic = deterministic
+                tasks.extend([(problem, name, solver_kwargs(task_args))] * args.repeats)
+
+    if args.memory_per_node == "enable":
+        tasks = list({task[0]: task for task in tasks if task[1] != "highs"}.values())
+        with multiprocessing.get_context("spawn").Pool(args.workers, maxtasksperchild=1) as pool:
+            records = pool.map(run_memory_task, tasks)
+        for record in records:
+            print(f"{record['instance']}\tvars: {record.get('vars')}\trows: {record.get('rows')}\t"
+                  f"bytes per child of the root: {record.get('bytes_per_root_child', record.get('error'))}", flush=True)
+        if args.output is not None:
+            with open(args.output, "w") as file:
+                json.dump(records, file, indent=1)
+        sys.exit(0)
+
+    records = []
+    # every run gets a fresh process, so the peak RSS belongs to this run only
+    with multiprocessing.get_context("spawn").Pool(args.workers, maxtasksperchild=1) as pool:
+        for record in pool.imap(run_task, tasks):
+            records.append(record)
+            print(f"{record['instance']}\t{record['mode']}\t{record.get('state', record.get('error'))}\t"
+                  f"time: {record.get('wall_time', float('nan')):.3f}\tnodes: {record.get('nodes')}\t"
+                  f"gap: {record.get('gap')}\tpeak rss: {record['peak_rss']:.1f} MB", flush=True)
+
+    if args.repeats > 1 or args.compare_determinism == "enable":
+        summary = reproducibility(records)
+        mean_times = {(item["instance"], item["mode"]): item["mean_time"] for item in summary}
+        for item in summary:
+            line = f"{item['instance']}\t{item['mode']}\truns: {item['runs']}\toutcomes: {item['outcomes']}"
+            if item["mean_time"] is not None:
+                line += f"\tmean time: {item['mean_time']:.3f}"
+            opportunistic_time = mean_times.get(
+                (item["instance"], item["mode"].replace("/deterministic", "/opportunistic")))
+            if item["mode"].endswith("/deterministic") and item["mean_time"] and opportunistic_time:
+                line += f"\tslowdown: {item['mean_time'] / opportunistic_time:.3f}"
+            print(line)
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(records, file, indent=1)
+
+    if args.csv is not None:
+        rows = [flatten(record) for record in records]
+        fields = list(dict.fromkeys(key for row in rows for key in row))
+        with open(args.csv, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(records, baseline,
+                              args.time_tolerance, args.min_time_diff)
+        for regression in regressions:
+            print("regression: " + regression)
+        if regressions:
+            sys.exit(1)
@@ -1,4 +1,6 @@
 class Bound:
+    __slots__ = ("lower", "upper")
+
     def __init__(self, lower: float, upper: float):
         self.lower = lower
         self.upper = upper
@@ -18,6 +20,7 @@ class Bound:
 
 class BnBBranch:
     from helpers.var import Var
+    __slots__ = ("var", "left_bound", "right_bound")
 
     def __init__(self, var: Var, left_bound: Bound, right_bound: Bound):
         self.var = var
@@ -0,0 +1,234 @@
+import argparse
+import json
+import sys
+from math import isinf
+
+import highspy
+
+from helpers.constraint import Constraint
+from helpers.linear_cut import LinearCut
+from helpers.var import Var
+
+
+class InfeasibilityCertificate:
+    # The proofs of the children of every strong-branching candidate are kept aside
+    # and written only for the nodes that close a part of the final tree: the leaves
+    # and the pruned children whose other side was fixed in the parent. A proof is
+    # a Farkas combination of the rows of the problem file that no point of its box
+    # can satisfy, the box is given by the branches and the fixings of the node. A
+    # dual ray that uses a row added by the solver proves nothing on its own, so its
+    # leaf has no proof.
+    def __init__(self) -> None:
+        self.leaves: list[dict] = []
+        self.fixings: list[dict] = []
+        self.number_of_leaves_without_proof = 0
+        self.__proofs: dict[int, dict] = {}
+
+    def add_leaf(self, node_id: int, branches: list[tuple[int, float, float]],
+                 fixings: list[tuple[int, int, float, float]], cut: LinearCut | None,
+                 multipliers: dict[int, float] | None, number_of_problem_rows: int) -> None:
+        if cut is None or any(constr_index >= number_of_problem_rows for constr_index in multipliers):
+            return
+        self.__proofs[node_id] = {
+            "branches": branches,
+            "fixings": fixings,
+            "multipliers": multipliers,
+            "indices": cut.indices,
+            "values": cut.values,
+            "rhs": cut.lower,
+        }
+
+    def close_leaf(self, node_id: int) -> None:
+        proof = self.__proofs.pop(node_id, None)
+        if proof is None:
+            self.number_of_leaves_without_proof += 1
+            return
+        self.leaves.append(proof)
+
+    def close_by_fixing(self, node_id: int, branches: list[tuple[int, float, float]],
+                        var_index: int, lower: float, upper: float) -> None:
+        proof = self.__proofs.pop(node_id, None)
+        if proof is None:
+            self.number_of_leaves_without_proof += 1
+        self.fixings.append({
+            "branches": branches,
+            "var": var_index,
+            "lower": lower,
+            "upper": upper,
+            "proof": proof,
+        })
+
+    def discard(self) -> None:
+        # the children of the candidates that were not taken, a restart drops only
+        # these, the closed boxes of the old tree stay infeasible
+        self.__proofs = {}
+
+    def state(self) -> dict:
+        # the pending proofs belong to one branching, a checkpoint is never taken
+        # in the middle of it
+        return {
+            "leaves": self.leaves,
+            "fixings": self.fixings,
+            "leaves_without_proof": self.number_of_leaves_without_proof,
+        }
+
+    def load_state(self, state: dict) -> None:
+        self.leaves = state["leaves"]
+        self.fixings = state["fixings"]
+        self.number_of_leaves_without_proof = state["leaves_without_proof"]
+
+    def write(self, path: str, vars: list[Var], constraints: list[Constraint]) -> None:
+        data = {
+            "leaves_without_proof": self.number_of_leaves_without_proof,
+            "leaves": self.leaves,
+            "fixings": self.fixings,
+        }
+        # only a certificate that passes the same check as the checker below is
+        # called a proof of infeasibility
+        errors = check_certificate(data, [var.lower for var in vars], [var.upper for var in vars],
+                                   [var.is_general for var in vars],
+                                   [(dict(zip((var.index for var in constr.vars), constr.meta.coeffs)),
+                                     constr.origin_lower, constr.origin_upper) for constr in constraints])
+        with open(path, "w") as file:
+            json.dump({
+                "status": "incomplete" if errors else "infeasible",
+                "errors": errors,
+                **data,
+            }, file, separators=(",", ":"))
+
+
+def proof_box(proof: dict, col_lower: list[float], col_upper: list[float]) -> dict[int, tuple[float, float]]:
+    box: dict[int, tuple[float, float]] = {}
+    restrictions = [tuple(branch) for branch in proof["branches"]] + \
+        [tuple(fixing[1:]) for fixing in proof["fixings"]]
+    for var_index, lower, upper in restrictions:
+        old_lower, old_upper = box.get(
+            var_index, (col_lower[var_index], col_upper[var_index]))
+        box[var_index] = (max(old_lower, lower), min(old_upper, upper))
+    return box
+
+
+def is_farkas_proof(multipliers: dict, box: dict[int, tuple[float, float]], col_lower: list[float],
+                    col_upper: list[float], rows: list[tuple[dict[int, float], float, float]],
+                    tolerance: float = 1e-6) -> bool:
+    # the rows times the multipliers add up to a valid row, the box is infeasible
+    # if the largest activity of this row on the box is below its bound
+    coefficients: dict[int, float] = {}
+    rhs = 0.0
+    for constr_index, multiplier in multipliers.items():
+        constr_index = int(constr_index)
+        if constr_index >= len(rows):
+            return False
+        coeffs, lower, upper = rows[constr_index]
+        bound = lower if multiplier > 0 else upper
+        if isinf(bound):
+            return False
+        rhs += multiplier * bound
+        for var_index, coeff in coeffs.items():
+            coefficients[var_index] = coefficients.get(
+                var_index, 0.0) + multiplier * coeff
+
+    scale = max(map(abs, coefficients.values()), default=0.0)
+    if scale == 0.0:
+        return rhs > tolerance
+    max_activity = 0.0
+    for var_index, coeff in coefficients.items():
+        lower, upper = box.get(
+            var_index, (col_lower[var_index], col_upper[var_index]))
+        if lower > upper:
+            return True
+        max_activity += max(coeff * lower, coeff * upper) if coeff != 0.0 else 0.0
+    return max_activity / scale < rhs / scale - tolerance * max(1.0, abs(rhs / scale))
+
+
+def covers(boxes: list[dict[int, tuple[float, float]]], col_lower: list[float], col_upper: list[float],
+           is_integer: list[bool]) -> bool:
+    # the problem box is split on the bounds of the proven boxes until every part
+    # lies in one of them, the branches are on integer variables only
+    def bounds(box: dict[int, tuple[float, float]], var_index: int) -> tuple[float, float]:
+        return box.get(var_index, (col_lower[var_index], col_upper[var_index]))
+
+    boxes = [box for box in boxes if all(lower <= upper for lower, upper in box.values())]
+    regions: list[dict[int, tuple[float, float]]] = [{}]
+    while regions:
+        region = regions.pop()
+        if any(all(lower <= bounds(region, var_index)[0] and bounds(region, var_index)[1] <= upper
+                   for var_index, (lower, upper) in box.items()) for box in boxes):
+            continue
+        for box in boxes:
+            if not all(max(lower, bounds(region, var_index)[0]) <= min(upper, bounds(region, var_index)[1])
+                       for var_index, (lower, upper) in box.items()):
+                continue
+            var_index, (lower, upper) = next(
+                (var_index, bound) for var_index, bound in box.items()
+                if not bound[0] <= bounds(region, var_index)[0] or not bounds(region, var_index)[1] <= bound[1])
+            if not is_integer[var_index]:
+                return False
+            region_lower, region_upper = bounds(region, var_index)
+            split = lower - 1 if region_lower < lower else upper
+            regions.append({**region, var_index: (region_lower, split)})
+            regions.append({**region, var_index: (split + 1, region_upper)})
+            break
+        else:
+            return False
+    return True
+
+
+def check_certificate(data: dict, col_lower: list[float], col_upper: list[float], is_integer: list[bool],
+                      rows: list[tuple[dict[int, float], float, float]]) -> list[str]:
+    errors = []
+    if data["leaves_without_proof"] > 0:
+        errors.append(f"{data['leaves_without_proof']} leaves have no proof")
+
+    proofs = [(f"leaf {leaf_idx}", leaf) for leaf_idx, leaf in enumerate(data["leaves"])] + \
+        [(f"fixing {fixing_idx}", fixing["proof"]) for fixing_idx, fixing in enumerate(data["fixings"])
+         if fixing["proof"] is not None]
+    boxes = []
+    for name, proof in proofs:
+        box = proof_box(proof, col_lower, col_upper)
+        if not is_farkas_proof(proof["multipliers"], box, col_lower, col_upper, rows):
+            errors.append(f"{name}: the multipliers do not prove its box infeasible")
+            continue
+        boxes.append(box)
+
+    if not covers(boxes, col_lower, col_upper, is_integer):
+        errors.append("the proven boxes do not cover the problem")
+    return errors
+
+
+def read_problem(path: str) -> tuple[list[float], list[float], list[bool], list[tuple[dict[int, float], float, float]]]:
+    # the problem is read by highs alone, so the check does not trust the solver
+    h = highspy.Highs()
+    h.silent()
+    h.readModel(path)
+    lp = h.getLp()
+    matrix = lp.a_matrix_
+    rows: list[tuple[dict[int, float], float, float]] = [
+        ({}, lower, upper) for lower, upper in zip(lp.row_lower_, lp.row_upper_)]
+    if matrix.format_ == highspy.MatrixFormat.kColwise:
+        for var_index in range(lp.num_col_):
+            for entry_idx in range(matrix.start_[var_index], matrix.start_[var_index + 1]):
+                rows[matrix.index_[entry_idx]][0][var_index] = matrix.value_[entry_idx]
+    else:
+        for constr_index in range(lp.num_row_):
+            for entry_idx in range(matrix.start_[constr_index], matrix.start_[constr_index + 1]):
+                rows[constr_index][0][matrix.index_[entry_idx]] = matrix.value_[entry_idx]
+    is_integer = [integrality == highspy.HighsVarType.kInteger for integrality in lp.integrality_] or \
+        [False] * lp.num_col_
+    return list(lp.col_lower_), list(lp.col_upper_), is_integer, rows
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("problem", type=str, help="Path to problem.")
+    parser.add_argument("certificate", type=str, help="Path to the infeasibility certificate.")
+    args = parser.parse_args()
+
+    with open(args.certificate) as file:
+        data = json.load(file)
+    errors = check_certificate(data, *read_problem(args.problem))
+    for error in errors:
+        print(error)
+    print("infeasibility proven" if not errors else "infeasibility not proven")
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,101 @@
+import json
+import os
+import highspy
+
+from helpers.graph_cut import GraphCut
+from helpers.linear_cut import LinearCut
+from helpers.solution import Solution
+from helpers.var import Var
+from mip_state import MipState
+from node import Branchability, Node
+
+
+COUNTERS = ["number_of_nodes",
+            "number_of_branches",
+            "number_of_relaxations",
+            "number_of_non_trivial_graph_cuts",
+            "number_of_objective_changes",
+            "number_of_resolved_nodes",
+            "number_of_dual_ray_cuts",
+            "number_of_restarts",
+            "number_of_local_cuts",
+            "number_of_strong_branching_fixings",
+            "number_of_root_cuts",
+            "number_of_cuts"]
+
+
+def save_checkpoint(path: str, stack: list[Node], cuts: list[GraphCut | LinearCut], mip_state: MipState) -> None:
+    data = {
+        "nodes": [node.branches for node in stack],
+        "fixings": [node.fixings for node in stack],
+        "cuts": [cut_to_list(cut) for cut in cuts],
+        "primal": solution_to_dict(mip_state.primal_solution),
+        "dual": solution_to_dict(mip_state.dual_solution),
+        "counters": {name: getattr(mip_state, name) for name in COUNTERS},
+        "lp_iterations": mip_state.work.lp_iterations,
+        "branchability": {item.name: value for item, value in mip_state.branchability_statistic.statistic.items()},
+        "adaptive": None if mip_state.adaptive is None else mip_state.adaptive.state(),
+        "certificate": None if mip_state.certificate is None else mip_state.certificate.state(),
+        "restart": None if mip_state.restart_policy is None else mip_state.restart_policy.state(),
+    }
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump(data, file, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path: str, mip_state: MipState, vars: list[Var]) -> tuple[list[tuple[list[tuple[int, float, float]], list[tuple[int, int, float, float]]]], list[GraphCut | LinearCut]]:
+    with open(path) as file:
+        data = json.load(file)
+
+    for name, value in data["counters"].items():
+        setattr(mip_state, name, value)
+    mip_state.work.lp_iterations = data["lp_iterations"]
+    for name, value in data["branchability"].items():
+        mip_state.branchability_statistic.statistic[Branchability[name]] = value
+    if mip_state.adaptive is not None and data.get("adaptive") is not None:
+        mip_state.adaptive.load_state(data["adaptive"])
+    if mip_state.certificate is not None and data.get("certificate") is not None:
+        mip_state.certificate.load_state(data["certificate"])
+    if mip_state.restart_policy is not None and data.get("restart") is not None:
+        mip_state.restart_policy.load_state(data["restart"])
+    solution_from_dict(mip_state.primal_solution, data["primal"], vars)
+    solution_from_dict(mip_state.dual_solution, data["dual"], vars)
+
+    nodes = [([tuple(branch) for branch in branches], [tuple(fixing) for fixing in fixings])
+             for branches, fixings in zip(data["nodes"], data["fixings"])]
+    cuts = [cut_from_list(cut) for cut in data["cuts"]]
+    return nodes, cuts
+
+
+def cut_to_list(cut: GraphCut | LinearCut) -> list:
+    if isinstance(cut, GraphCut):
+        return ["graph", cut.number_of_negative, cut.indices.tolist(), cut.values.tolist(), cut.is_trivial, cut.scope]
+    return ["linear", cut.indices, cut.values, cut.lower, cut.upper, cut.scope]
+
+
+def cut_from_list(data: list) -> GraphCut | LinearCut:
+    cut = GraphCut(*data[1:-1]) if data[0] == "graph" else LinearCut(*data[1:-1])
+    cut.scope = [tuple(branch) for branch in data[-1]]
+    return cut
+
+
+def solution_to_dict(solution: Solution) -> dict | None:
+    if solution.objective is None:
+        return None
+    return {
+        "objective": solution.objective,
+        "values": list(solution.value[1]),
+        "status": solution.status.name,
+        "is_primal": solution.is_primal,
+    }
+
+
+def solution_from_dict(solution: Solution, data: dict | None, vars: list[Var]) -> None:
+    if data is None:
+        return
+    solution.objective = data["objective"]
+    solution.value = (vars.copy(), data["values"])
+    solution.status = highspy.HighsModelStatus.__members__[data["status"]]
+    solution.is_primal = data["is_primal"]
@@ -1,12 +1,29 @@
+import os
 from enum import Enum, auto
+from math import isinf
 import highspy
+import numpy as np
 
 from bound import Bound
 from graph import Graph
 from helpers.constraint import Constraint
 from helpers.graph_cut import GraphCut
+from helpers.linear_cut import LinearCut
 from helpers.solution import Solution
 from helpers.var import Var
+from model_snapshot import load_snapshot, lp_to_arrays, save_snapshot, snapshot_path
+from adaptive import MAX_PROPAGATION_PASSES, AdaptiveController
+from limits import WorkCounter
+from lp_cache import LPCache, LPResult, bounds_key, rows_signature
+from profiler import Profiler
+from numpy_backend import BackendMismatch, MatrixArrays, candidate_bounds, resolve_backend
+
+
+# the methods timed by a profiler and their phases
+TIMED_METHODS = {"run": "lp_solve",
+                 "copy": "model_copy",
+                 "add_rows": "cut_insertion",
+                 "update_vars_bounds": "propagation"}
 
 
 class SolveRes(Enum):
@@ -22,7 +39,13 @@ class ExtendedHighsModel(highspy.Highs):
                  cutting_mod: int = 1,
                  fuip_size: int = 1,
                  path_to_problem: str | None = None,
-                 primal_tolerance: float = 1e-9):
+                 primal_tolerance: float = 1e-9,
+                 snapshot_dir: str | None = None,
+                 backend: str = "python",
+                 lp_cache: LPCache | None = None,
+                 work: WorkCounter | None = None,
+                 adaptive: AdaptiveController | None = None,
+                 profiler: Profiler | None = None):
 
         super().__init__()
         self.silent()
@@ -34,6 +57,28 @@ class ExtendedHighsModel(highspy.Highs):
         self.with_presolve = with_presolve
         self.graph = Graph(fuip_size=fuip_size, cutting_mod=cutting_mod)
         self.is_consistent: bool = False
+        # old bounds of every changed variable or row with the index of the implying
+        # constraint, undoing them returns the model to any earlier mark of this node
+        self.trail: list[tuple[Var | Constraint, float, float, int]] = []
+        self.backend = backend
+        self.__arrays: MatrixArrays | None = None
+        # the hash of the rows after every added row, it is the part of the cache key
+        # that does not change with the bounds
+        self.lp_cache = lp_cache
+        self.work = work
+        self.adaptive = adaptive
+        self.profiler = profiler
+        if profiler is not None:
+            # the timed methods shadow the plain ones only on the profiled models,
+            # the others call them without any check
+            for name, phase in TIMED_METHODS.items():
+                setattr(self, name, profiler.timed(phase, getattr(self, name)))
+        # the rows of the problem file, the rows after these are added by the solver
+        self.number_of_problem_rows = 0
+        self.row_signatures: list[bytes] = [b""]
+        self.__lp_key: bytes | None = None
+        self.__lp_result: LPResult | None = None
+        self.__lp_from_cache = False
 
         # ----------------------
         self.solved = False
@@ -42,22 +87,51 @@ class ExtendedHighsModel(highspy.Highs):
         if path_to_problem is None:
             return
 
-        self.readModel(path_to_problem)
-        self.presolve()
-
-        lp = self.getLp()
-        for var_idx, (var_type, var_name, var_lower, var_upper) in enumerate(zip(lp.integrality_, lp.col_names_, lp.col_lower_, lp.col_upper_)):
+        snapshot = None if snapshot_dir is None else snapshot_path(
+            snapshot_dir, path_to_problem)
+        if snapshot is not None and os.path.isdir(snapshot):
+            arrays, lp = load_snapshot(snapshot)
+            self.passModel(lp)
+        else:
+            self.readModel(path_to_problem)
+            self.presolve()
+            lp = self.getLp()
+            if snapshot is not None:
+                os.makedirs(snapshot_dir, exist_ok=True)
+                save_snapshot(snapshot, lp)
+            arrays = lp_to_arrays(lp)
+
+        self.__build_model(arrays)
+        self.number_of_problem_rows = len(self.constraints)
+        self.backend = resolve_backend(backend, len(arrays["a_value"]))
+        if self.backend != "python":
+            self.__arrays = MatrixArrays.from_constraints(
+                self.vars, self.constraints)
+            self.solution.backend = self.backend
+            self.solution.is_general = self.__arrays.is_general
+
+        number_of_vars = len(self.vars)
+        self.changeColsIntegrality(number_of_vars,
+                                   np.arange(number_of_vars, dtype=np.int32),
+                                   np.zeros(number_of_vars, dtype=np.uint8))
+
+    def __build_model(self, arrays: dict[str, np.ndarray]) -> None:
+        is_general = (arrays["integrality"] ==
+                      int(highspy.HighsVarType.kInteger)).tolist()
+        for var_idx, (var_name, var_lower, var_upper, var_is_general) in enumerate(zip(
+                arrays["col_names"].tolist(), arrays["col_lower"].tolist(), arrays["col_upper"].tolist(), is_general)):
             self.vars.append(
                 Var(
                     index=var_idx,
                     name=var_name,
                     lower_bound=var_lower,
                     upper_bound=var_upper,
-                    is_general=var_type == highspy.HighsVarType.kInteger,
+                    is_general=var_is_general,
                 )
             )
 
-        for constr_idx, (constr_lower, constr_upper) in enumerate(zip(lp.row_lower_, lp.row_upper_)):
+        for constr_idx, (constr_lower, constr_upper) in enumerate(zip(
+                arrays["row_lower"].tolist(), arrays["row_upper"].tolist())):
             self.constraints.append(
                 Constraint(
                     index=constr_idx,
@@ -66,93 +140,253 @@ class ExtendedHighsModel(highspy.Highs):
                 )
             )
 
-        const_idx_and_value = list(
-            zip(lp.a_matrix_.index_, lp.a_matrix_.value_)
-        )
-        for var_idx in range(len(lp.a_matrix_.start_) - 1):
-            for idx in range(lp.a_matrix_.start_[var_idx], lp.a_matrix_.start_[var_idx + 1]):
-                constr_idx, coeff = const_idx_and_value[idx]
-                self.constraints[constr_idx].add_var(self.vars[var_idx], coeff)
-                self.vars[var_idx].add_constraint(self.constraints[constr_idx])
+        # the rows are gathered by a stable sort of the column-wise matrix,
+        # so the variables of each row stay in the column order
+        a_start = np.asarray(arrays["a_start"])
+        a_index = np.asarray(arrays["a_index"])
+        col_of_entry = np.repeat(np.arange(len(self.vars)), np.diff(a_start))
+        order = np.argsort(a_index, kind="stable")
+        row_start = np.searchsorted(
+            a_index[order], np.arange(len(self.constraints) + 1)).tolist()
+        row_vars = [self.vars[var_idx]
+                    for var_idx in col_of_entry[order].tolist()]
+        row_values = np.asarray(arrays["a_value"])[order].tolist()
+        for constr in self.constraints:
+            start, end = row_start[constr.index], row_start[constr.index + 1]
+            constr.set_terms(row_vars[start:end], row_values[start:end])
 
+        a_start = a_start.tolist()
+        a_index = a_index.tolist()
         for var in self.vars:
-            self.setContinuous(var.index)
+            var.constraint_indices = tuple(
+                a_index[a_start[var.index]:a_start[var.index + 1]])
 
     def copy(self):
-        res = ExtendedHighsModel(self.with_presolve)
+        res = ExtendedHighsModel(self.with_presolve, backend=self.backend,
+                                 lp_cache=self.lp_cache, work=self.work, adaptive=self.adaptive,
+                                 profiler=self.profiler)
+        res.number_of_problem_rows = self.number_of_problem_rows
+        res.__arrays = self.__arrays
+        res.row_signatures = self.row_signatures.copy()
+        res.solution.backend = self.solution.backend
+        res.solution.is_general = self.solution.is_general
         res.passModel(self.getModel())
         res.setBasis(self.getBasis())
 
-        for constr in self.constraints:
-            res.constraints.append(constr.copy_empty())
-
+        # the copies share the names, the integrality and the coefficients,
+        # only the bounds and the activities belong to the new node
         for var in self.vars:
-            res.vars.append(var.copy_empty())
+            res.vars.append(var.copy())
 
         for constr in self.constraints:
-            nconstr = res.constraints[constr.index]
-            for var in constr.info:
-                nvar = res.vars[var.index]
-                nconstr.add_var(nvar, constr.info[var])
-                nvar.add_constraint(nconstr)
+            res.constraints.append(constr.copy(res.vars))
 
-        res.graph = self.graph.copy(res.vars)
+        res.graph = self.graph.copy()
+        # a node is never undone past its creation, so the trail of the copy starts empty
         return res
 
-    def add_row(self, graph_cut: GraphCut) -> None:
+    def add_row(self, cut: GraphCut | LinearCut) -> None:
+        self.add_rows([cut])
+
+    def add_linear_row(self, indices: list[int], values: list[float], lower: float, upper: float) -> None:
+        self.add_rows([LinearCut(indices, values, lower, upper)])
+
+    def add_rows(self, cuts: list[GraphCut | LinearCut]) -> None:
+        # all cuts go to highs in one call with the rows in the CSR format
+        if len(cuts) == 0:
+            return
         self.is_consistent = False
-        self.addRow(1 - graph_cut.number_of_negative, float("inf"),
-                    len(graph_cut.indices), graph_cut.indices, graph_cut.values)
-        self.constraints.append(Constraint(len(self.constraints), 1 -
-                                           graph_cut.number_of_negative, float("inf")))
-        for index, coeff in zip(graph_cut.indices, graph_cut.values):
-            self.constraints[-1].add_var(self.vars[index], coeff)
-            self.vars[index].add_constraint(self.constraints[-1])
+        indices = [np.asarray(cut.indices, dtype=np.int32) for cut in cuts]
+        values = [np.asarray(cut.values, dtype=np.float64) for cut in cuts]
+        lower = np.array([cut.lower for cut in cuts], dtype=np.float64)
+        upper = np.array([cut.upper for cut in cuts], dtype=np.float64)
+        starts = np.zeros(len(cuts), dtype=np.int32)
+        np.cumsum([len(row_indices) for row_indices in indices[:-1]], out=starts[1:])
+        all_indices = np.concatenate(indices)
+        all_values = np.concatenate(values)
+        self.addRows(len(cuts), lower, upper, len(all_indices),
+                     starts, all_indices, all_values)
+
+        first_index = len(self.constraints)
+        for cut, row_indices, row_values in zip(cuts, indices, values):
+            self.row_signatures.append(rows_signature(
+                self.row_signatures[-1], row_indices, row_values, cut.lower, cut.upper))
+            constr = Constraint(len(self.constraints), cut.lower,
+                                cut.upper, scope=len(cut.scope), is_graph_cut=isinstance(cut, GraphCut))
+            constr.set_terms([self.vars[index] for index in row_indices.tolist()],
+                             row_values.tolist())
+            for var in constr.vars:
+                var.add_constraint(constr)
+            self.constraints.append(constr)
+        if self.__arrays is not None:
+            self.__arrays = self.__arrays.with_rows(
+                self.constraints[first_index:])
+
+    def cut_scope(self) -> int:
+        return max((constr.scope for constr in self.constraints), default=0)
 
     def delete_last_row(self) -> None:
         self.is_consistent = False
         constr = self.constraints.pop()
         self.deleteRows(1, [constr.index])
-        for var in constr.info:
+        self.row_signatures.pop()
+        for var in constr.vars:
             var.remove_last_constraint()
+        if self.__arrays is not None:
+            self.__arrays = MatrixArrays.from_constraints(
+                self.vars, self.constraints)
 
     def validate_cut(self, graph_cut: GraphCut) -> bool:
-        for index, val in zip(graph_cut.indices, graph_cut.values):
-            if val == -1:
-                self.changeColBounds(index, 1, 1)
-            else:
-                self.changeColBounds(index, 0, 0)
+        # the literals are fixed to falsify the cut and undone after the LP
+        mark = self.trail_mark()
+        is_consistent = self.is_consistent
+        for index, val in zip(graph_cut.indices.tolist(), graph_cut.values.tolist()):
+            value = 1 if val == -1 else 0
+            self.change_var_bounds(self.vars[index], value, value)
 
         self.run()
+        self.count_work()
         status = self.getModelStatus()
 
-        for index in graph_cut.indices:
-            self.changeColBounds(
-                index, self.vars[index].lower, self.vars[index].upper)
-
+        self.backtrack(mark)
+        self.is_consistent = is_consistent
         return status == highspy.HighsModelStatus.kInfeasible
 
-    def change_var_bounds(self, var: Var, lower: float, upper: float) -> None:
+    def dual_ray_cut(self, global_vars: list[Var], tolerance: float = 1e-6) -> tuple[LinearCut, dict[int, float]] | None:
+        dual_ray = self.dual_ray()
+        if dual_ray is None:
+            return None
+        for sign in (1.0, -1.0):
+            result = self.__farkas_cut(
+                [sign * value for value in dual_ray], global_vars, tolerance)
+            if result is not None:
+                return result
+        return None
+
+    def __farkas_cut(self, dual_ray: list[float], global_vars: list[Var], tolerance: float) -> tuple[LinearCut, dict[int, float]] | None:
+        # the rows aggregated with the origin bounds give a globally valid row,
+        # it proves the infeasibility of the node if the local bounds can not reach it
+        coefficients: dict[int, float] = {}
+        rhs = 0.0
+        multipliers: dict[int, float] = {}
+        for constr in self.constraints:
+            multiplier = dual_ray[constr.index]
+            if abs(multiplier) <= 1e-9:
+                continue
+            bound = constr.origin_lower if multiplier > 0 else constr.origin_upper
+            if isinf(bound):
+                return None
+            rhs += multiplier * bound
+            multipliers[constr.index] = multiplier
+            for var, coeff in constr.terms():
+                coefficients[var.index] = coefficients.get(
+                    var.index, 0.0) + multiplier * coeff
+
+        scale = max(map(abs, coefficients.values()), default=0.0)
+        if scale == 0.0:
+            return None
+
+        indices = []
+        values = []
+        for index, coeff in coefficients.items():
+            var = global_vars[index]
+            if var.lower == var.upper:
+                rhs -= coeff * var.lower
+                continue
+            if abs(coeff) <= 1e-9 * scale:
+                contribution = max(coeff * var.lower, coeff * var.upper)
+                if not isinf(contribution):
+                    rhs -= contribution
+                    continue
+            indices.append(index)
+            values.append(coeff / scale)
+        rhs /= scale
+
+        max_activity = sum(max(coeff * self.vars[index].lower, coeff * self.vars[index].upper)
+                           for index, coeff in zip(indices, values))
+        if max_activity >= rhs - tolerance * max(1.0, abs(rhs)):
+            return None
+        return LinearCut(indices, values, rhs, float("inf")), multipliers
+
+    def change_var_bounds(self, var: Var, lower: float, upper: float, reason: int = -1) -> None:
+        var = self.vars[var.index]
+        self.trail.append((var, var.lower, var.upper, reason))
+        self.__set_var_bounds(var, lower, upper)
+
+    def change_constr_bounds(self, constr: Constraint, lower: float, upper: float) -> None:
+        self.trail.append((constr, constr.lower, constr.upper, -1))
+        self.__set_constr_bounds(constr, lower, upper)
+
+    def trail_mark(self) -> int:
+        return len(self.trail)
+
+    def backtrack(self, mark: int) -> None:
+        while len(self.trail) > mark:
+            item, lower, upper, _ = self.trail.pop()
+            if isinstance(item, Var):
+                self.__set_var_bounds(item, lower, upper)
+            else:
+                self.__set_constr_bounds(item, lower, upper)
+
+    def __set_var_bounds(self, var: Var, lower: float, upper: float) -> None:
         self.is_consistent = False
         self.changeColBounds(var.index, lower, upper)
-        self.vars[var.index].lower = lower
-        self.vars[var.index].upper = upper
+        old_lower, old_upper = var.lower, var.upper
+        var.lower = lower
+        var.upper = upper
+        for constr_index in var.constraint_indices:
+            self.constraints[constr_index].on_bounds_change(var, old_lower, old_upper)
+
+    def __set_constr_bounds(self, constr: Constraint, lower: float, upper: float) -> None:
+        self.is_consistent = False
+        self.changeRowBounds(constr.index, lower, upper)
+        constr.lower = lower
+        constr.upper = upper
 
     def solve(self, branched_var: Var | None = None) -> SolveRes:
         if self.is_consistent:
             return SolveRes.AlreadyConsistent
 
+        if self.prepare(branched_var):
+            self.run()
+        return self.finish()
+
+    # A solve is split into the python parts before and after run(), so run() can
+    # be done by another thread. It returns whether run() is needed at all.
+    def prepare(self, branched_var: Var | None = None) -> bool:
         if self.with_presolve:
             if branched_var is not None:
                 self.graph.new_depth(self.vars[branched_var.index])
             self.update_vars_bounds()
 
-        self.run()
+        self.__lp_key = None
+        self.__lp_result = None
+        if self.lp_cache is not None:
+            self.__lp_key = bounds_key(
+                self.row_signatures[-1], self.vars, self.constraints)
+            self.__lp_result = self.lp_cache.get(self.__lp_key)
+        self.__lp_from_cache = self.__lp_result is not None
+        return not self.__lp_from_cache
+
+    def count_work(self) -> None:
+        # it is called by the thread that owns the search after every run(), the
+        # pipelined runs are counted in finish() in the order of the candidates
+        if self.work is not None:
+            self.work.lp_iterations += self.getInfo().simplex_iteration_count
+
+    def finish(self) -> SolveRes:
+        if not self.__lp_from_cache:
+            self.count_work()
+            self.__lp_result = LPResult(self.getInfo().objective_function_value,
+                                        self.getModelStatus(), self.getSolution().col_value)
+            if self.lp_cache is not None:
+                self.lp_cache.put(self.__lp_key, self.__lp_result)
+
         res_solution = self.solution.set_solution(
-            objective=self.getInfo().objective_function_value,
+            objective=self.__lp_result.objective,
             value=(
-                self.vars, self.getSolution().col_value),
-            status=self.getModelStatus())
+                self.vars, self.__lp_result.col_value),
+            status=self.__lp_result.status)
         self.is_consistent = True
 
         if not self.solved:
@@ -162,14 +396,44 @@ class ExtendedHighsModel(highspy.Highs):
             return SolveRes.ResolvedAndChanged
         return SolveRes.ResolvedAndUnchanged
 
+    def dual_ray(self) -> list[float] | None:
+        if self.__lp_result is not None and self.__lp_result.dual_ray is not None:
+            return self.__lp_result.dual_ray
+        # a cached result does not leave its solve in highs
+        if self.__lp_from_cache:
+            self.run()
+            self.count_work()
+            self.__lp_from_cache = False
+
+        has_dual_ray, dual_ray = self.getDualRay()[1:]
+        if not has_dual_ray:
+            return None
+        dual_ray = list(dual_ray)
+        if self.__lp_key is not None:
+            self.lp_cache.set_dual_ray(self.__lp_key, self.__lp_result, dual_ray)
+        return dual_ray
+
     def update_vars_bounds(self):
-        for i in range(10):
+        if self.adaptive is None:
+            return self.__propagate(MAX_PROPAGATION_PASSES)[0]
+
+        mark = self.trail_mark()
+        passes = self.adaptive.propagation_passes
+        result, number_of_passes = self.__propagate(passes)
+        # only the bound changes of the variables have an implying row
+        reasons = [reason for _, _, _, reason in self.trail[mark:] if reason >= 0]
+        self.adaptive.on_propagation(len(self.constraints), number_of_passes, len(reasons),
+                                     sum(1 for reason in reasons if self.constraints[reason].meta.is_graph_cut),
+                                     result and number_of_passes == passes and not self.presolver_stopped)
+        return result
+
+    def __propagate(self, passes: int) -> tuple[bool, int]:
+        for i in range(passes):
             have_changes = False
-            constrs_updates: list[dict[Var, Bound]] = []
-            for constr in self.constraints:
-                if not constr.update_vars(constrs_updates):
-                    self.presolver_stopped = True
-                    return False
+            constrs_updates = self.__candidate_bounds()
+            if constrs_updates is None:
+                self.presolver_stopped = True
+                return False, i + 1
 
             for constr_index, constr_update in enumerate(constrs_updates):
                 if len(constr_update) == 0:
@@ -177,19 +441,36 @@ class ExtendedHighsModel(highspy.Highs):
                 for var, bound in constr_update.items():
                     if not var.is_valid_update(bound.lower, bound.upper):
                         continue
-                    self.change_var_bounds(var, bound.lower, bound.upper)
+                    self.change_var_bounds(
+                        var, bound.lower, bound.upper, constr_index)
                     self.graph.add_connection(
                         var, self.constraints[constr_index])
-                self.constraints[constr_index].update_lower_upper_by_activity()
-                self.changeRowBounds(
-                    constr_index, self.constraints[constr_index].lower, self.constraints[constr_index].upper)
+                constr = self.constraints[constr_index]
+                activity = constr.activity()
+                if activity[0] > constr.lower or activity[1] < constr.upper:
+                    self.change_constr_bounds(constr, max(constr.lower, activity[0]),
+                                              min(constr.upper, activity[1]))
                 have_changes = True
 
             self.graph.next_iteration()
             self.presolver_stopped = not have_changes
             if self.presolver_stopped:
+                return True, i + 1
+        return True, passes
+
+    def __candidate_bounds(self) -> list[dict[Var, Bound]] | None:
+        if self.backend == "numpy":
+            return candidate_bounds(self.__arrays, self.vars, self.constraints)
+
+        constrs_updates: list[dict[Var, Bound]] = []
+        for constr in self.constraints:
+            if not constr.update_vars(constrs_updates):
+                constrs_updates = None
                 break
-        return True
+
+        if self.backend == "check" and candidate_bounds(self.__arrays, self.vars, self.constraints) != constrs_updates:
+            raise BackendMismatch("The numpy propagation differs from the python one")
+        return constrs_updates
 
     def get_var(self, index: int) -> Var:
         return self.vars[index]
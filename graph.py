@@ -1,105 +1,130 @@
 from bound import Bound
-from helpers.constraint import Constraint
+from helpers.constraint import Constraint, ConstraintMeta
 from helpers.graph_cut import GraphCut
 from helpers.var import Var
 
 
 class GraphNode:
-    def __init__(self, depth: int, iteration: int, var: Var):
+    __slots__ = ("depth", "iteration", "var_index", "bound", "is_literal", "input_nodes", "output_nodes")
+
+    def __init__(self, depth: int, iteration: int, var_index: int, bound: Bound, is_literal: bool = False):
         self.depth = depth
         self.iteration = iteration
-        self.var = var
-        self.bound = Bound(var.lower, var.upper)
+        self.var_index = var_index
+        self.bound = bound
+        # a decision or a fixing, it has no reasons in the graph
+        self.is_literal = is_literal
         self.input_nodes: list[int] = []
         self.output_nodes: list[int] = []
 
-    def copy(self, new_vars: list[Var]):
-        new_graph_node = GraphNode(
-            self.depth, self.iteration, new_vars[self.var.index])
-        new_graph_node.bound = Bound(
-            new_graph_node.var.lower, new_graph_node.var.upper)
-        for node_idx in self.input_nodes:
-            new_graph_node.input_nodes.append(node_idx)
-        for node_idx in self.output_nodes:
-            new_graph_node.output_nodes.append(node_idx)
-        return new_graph_node
-
 
 class GraphEdge:
+    __slots__ = ("first_node_index", "second_node_index")
+
     def __init__(self, first_node_index: int, second_node_index: int):
         self.first_node_index = first_node_index
         self.second_node_index = second_node_index
 
-    def copy(self):
-        return GraphEdge(self.first_node_index, self.second_node_index)
-
 
 class Graph:
+    # The propagation only appends a record per bound change: the variable, its new
+    # bounds, the depth and the iteration, the row that implied it, whether it is a
+    # decision or a fixing without reasons and the number of records visible to the
+    # later implications. The nodes and the edges are built from the records when a
+    # conflict analysis or the recorder needs them, so the feasible nodes never
+    # pay for them. The records are immutable and the rows are the shared
+    # metadata, so a copy of the graph is a copy of the list.
     def __init__(self, depth: int = 0, iteration: int = 0, fuip_size: int = 1, cutting_mod: int = 1):
         self.iteration = iteration
         self.depth = depth
-        self.vars_index: dict[Var, list[int]] = {}
-        self.nodes: list[GraphNode] = []
-        self.edges: list[GraphEdge] = []
+        self.records: list[tuple[int, float, float, int, int, ConstraintMeta | None, bool, int]] = []
         self.origins: list[int] = []
-        self.drains: list[set[int]] = [set()]
         self.fuip_size = fuip_size
         self.cutting_mod = cutting_mod
         self.end_of_index = 0
 
-    def get_last_node_index(self, var: Var) -> int:
-        return self.vars_index[var][-1]
+        # the part built from the records so far
+        self.vars_index: dict[int, list[int]] = {}
+        self.nodes: list[GraphNode] = []
+        self.edges: list[GraphEdge] = []
+        self.drains: list[set[int]] = [set()]
+        self.__number_of_indexed = 0
 
     def new_depth(self, var: Var) -> None:
         self.depth += 1
         self.iteration = 0
-        node_idx = self.add_node(var)
+        node_idx = self.add_node(var, is_literal=True)
         self.add_all_to_index()
         self.origins.append(node_idx)
-        self.drains.append({node_idx})
         self.iteration = 1
 
+    def add_fixing(self, var: Var) -> None:
+        # a bound implied outside of the propagation has no reasons in the graph,
+        # it is a literal of every cut like a decision and a root of its own
+        node_idx = self.add_node(var, is_literal=True)
+        self.add_all_to_index()
+        self.origins.append(node_idx)
+
     def next_iteration(self) -> None:
         self.iteration += 1
         self.add_all_to_index()
 
     def add_all_to_index(self) -> None:
-        for node_idx in range(self.end_of_index, len(self.nodes)):
-            node = self.nodes[node_idx]
-            if node.var in self.vars_index:
-                self.vars_index[node.var].append(node_idx)
-            else:
-                self.vars_index[node.var] = [node_idx]
-        self.end_of_index = len(self.nodes)
+        self.end_of_index = len(self.records)
 
-    def add_node(self, var: Var) -> int:
-        self.nodes.append(GraphNode(self.depth, self.iteration, var))
-        return len(self.nodes) - 1
+    def add_node(self, var: Var, reason: ConstraintMeta | None = None, is_literal: bool = False) -> int:
+        self.records.append((var.index, var.lower, var.upper, self.depth,
+                             self.iteration, reason, is_literal, self.end_of_index))
+        return len(self.records) - 1
 
     def add_connection(self, var: Var,  constr: Constraint) -> None:
-        new_node_index = self.add_node(var)
-
-        for another_var in constr.info:
-            if another_var == var or another_var not in self.vars_index:
+        self.add_node(var, constr.meta)
+
+    def build(self) -> None:
+        for record_idx in range(len(self.nodes), len(self.records)):
+            var_index, lower, upper, depth, iteration, reason, is_literal, end_of_index = self.records[record_idx]
+            self.__index_until(end_of_index)
+            self.nodes.append(GraphNode(depth, iteration, var_index, Bound(lower, upper), is_literal))
+            # only a decision opens a depth, a fixing ends a path like a decision
+            if depth == len(self.drains):
+                self.drains.append({record_idx})
+            elif is_literal:
+                self.drains[depth].add(record_idx)
+            if reason is None:
                 continue
-            another_node_index = self.get_last_node_index(another_var)
 
-            self.edges.append(
-                GraphEdge(another_node_index, new_node_index))
-            self.add_node_connection(another_node_index, new_node_index)
+            for another_var_index in reason.positions:
+                if another_var_index == var_index or another_var_index not in self.vars_index:
+                    continue
+                another_node_index = self.vars_index[another_var_index][-1]
+
+                self.edges.append(
+                    GraphEdge(another_node_index, record_idx))
+                self.add_node_connection(another_node_index, record_idx)
+
+    def __index_until(self, end_of_index: int) -> None:
+        for node_idx in range(self.__number_of_indexed, end_of_index):
+            var_index = self.nodes[node_idx].var_index
+            if var_index in self.vars_index:
+                self.vars_index[var_index].append(node_idx)
+            else:
+                self.vars_index[var_index] = [node_idx]
+        self.__number_of_indexed = max(self.__number_of_indexed, end_of_index)
 
     def add_node_connection(self, from_node: int, in_node: int) -> None:
+        depth = self.nodes[in_node].depth
         self.nodes[from_node].output_nodes.append(in_node)
         self.nodes[in_node].input_nodes.append(from_node)
 
-        if self.nodes[from_node].depth <= self.nodes[in_node].depth:
-            self.drains[self.depth].discard(from_node)
+        if self.nodes[from_node].depth <= depth:
+            self.drains[depth].discard(from_node)
         if len(self.nodes[in_node].output_nodes) == 0:
-            self.drains[self.depth].add(in_node)
+            self.drains[depth].add(in_node)
 
     def to_plot_info(self) -> tuple[dict[int, GraphNode],
                                     list[tuple[int, int]],
                                     list[int]]:
+        self.build()
         nodes = {}
         edges = []
         origins = []
@@ -120,31 +145,12 @@ class Graph:
 
         return nodes, edges, origins
 
-    def copy(self, new_vars: list[Var]):
+    def copy(self):
         new_graph = Graph(self.depth, self.iteration,
                           self.fuip_size, self.cutting_mod)
-
-        for var, states in self.vars_index.items():
-            new_states = []
-            for node_index in states:
-                new_states.append(node_index)
-            new_graph.vars_index[new_vars[var.index]] = new_states
-
-        for graph_node in self.nodes:
-            new_graph.nodes.append(graph_node.copy(new_vars))
-
-        for edge in self.edges:
-            new_graph.edges.append(edge.copy())
-
-        for node_index in self.origins:
-            new_graph.origins.append(node_index)
-        new_graph.end_of_index = len(new_graph.nodes)
-
-        for idx, sets in enumerate(self.drains):
-            if idx == 0:
-                continue
-            new_graph.drains.append(sets.copy())
-
+        new_graph.records = self.records.copy()
+        new_graph.origins = self.origins.copy()
+        new_graph.end_of_index = self.end_of_index
         return new_graph
 
     def find_FUIP(self) -> list[int]:
@@ -154,22 +160,32 @@ class Graph:
                                       dict[int, set[int]]] = {}
         number_nodes_on_depth: dict[int, int] = {}
         max_nodes_iteration_on_depth: dict[int, int] = {}
+        # the fixings after the decision of a depth have no reasons, so they are never
+        # resolved and do not count for the FUIP group, the cut keeps them all
+        fixings: set[int] = set()
+
+        def add_to_front(node_idx: int) -> None:
+            node = self.nodes[node_idx]
+            if node.is_literal and node.iteration > 0:
+                fixings.add(node_idx)
+                return
+            nodes_on_iteration = current_implication_set[node.depth].setdefault(
+                node.iteration, set())
+            if node_idx in nodes_on_iteration:
+                return
+            nodes_on_iteration.add(node_idx)
+            number_nodes_on_depth[node.depth] += 1
+            max_nodes_iteration_on_depth[node.depth] = max(
+                node.iteration, max_nodes_iteration_on_depth[node.depth])
 
         for depth in range(1, self.depth + 1):
             current_implication_set[depth] = {}
             number_nodes_on_depth[depth] = 0
             max_nodes_iteration_on_depth[depth] = 0
 
+        for depth in range(1, self.depth + 1):
             for node_idx in self.drains[depth]:
-                if self.nodes[node_idx].iteration in current_implication_set[depth]:
-                    current_implication_set[depth][self.nodes[node_idx].iteration].add(
-                        node_idx)
-                else:
-                    current_implication_set[depth][self.nodes[node_idx].iteration] = {
-                        node_idx}
-                max_nodes_iteration_on_depth[depth] = max(
-                    self.nodes[node_idx].iteration, max_nodes_iteration_on_depth[depth])
-                number_nodes_on_depth[depth] += 1
+                add_to_front(node_idx)
 
         for depth in range(self.depth, 0, -1):
             if number_nodes_on_depth[depth] <= self.fuip_size:
@@ -187,19 +203,9 @@ class Graph:
                 ready = False
                 for node_idx in current_implication_set[depth][iteration]:
                     for implication_node_idx in self.nodes[node_idx].input_nodes:
-                        implication_node = self.nodes[implication_node_idx]
-                        if implication_node.depth == 0:
+                        if self.nodes[implication_node_idx].depth == 0:
                             continue
-
-                        if implication_node.iteration in current_implication_set[implication_node.depth]:
-                            if implication_node_idx not in current_implication_set[implication_node.depth][implication_node.iteration]:
-                                current_implication_set[implication_node.depth][implication_node.iteration].add(
-                                    implication_node_idx)
-                                number_nodes_on_depth[implication_node.depth] += 1
-                        else:
-                            current_implication_set[implication_node.depth][implication_node.iteration] = {
-                                implication_node_idx}
-                            number_nodes_on_depth[implication_node.depth] += 1
+                        add_to_front(implication_node_idx)
 
                     number_nodes_on_depth[depth] -= 1
                     removed_nodes.add(node_idx)
@@ -216,8 +222,29 @@ class Graph:
 
                 current_implication_set[depth].pop(iteration)
 
+        graph_cut.extend(sorted(fixings))
         return graph_cut
 
+    def separates(self, nodes_indices: list[int]) -> bool:
+        # the cut holds if every path from a decision or a fixing to the conflict
+        # passes through it, the nodes of the root depth hold in the whole tree
+        cut = set(nodes_indices)
+        visited = set()
+        stack = [node_idx for depth in range(1, self.depth + 1)
+                 for node_idx in self.drains[depth]]
+        while stack:
+            node_idx = stack.pop()
+            if node_idx in cut or node_idx in visited:
+                continue
+            visited.add(node_idx)
+            node = self.nodes[node_idx]
+            if node.depth == 0:
+                continue
+            if node.is_literal:
+                return False
+            stack.extend(node.input_nodes)
+        return True
+
     def leafs(self) -> list[int]:
         graph_cut: list[int] = []
 
@@ -228,32 +255,46 @@ class Graph:
         return graph_cut
 
     def get_front_nodes_indices(self) -> list[int]:
+        self.build()
         if self.cutting_mod == 0:
             return []
         elif self.cutting_mod == 1:
             return self.find_FUIP()
         elif self.cutting_mod == 2:
-            return self.origins
+            # the fixings of the root hold in the whole tree
+            return [node_idx for node_idx in self.origins if self.nodes[node_idx].depth > 0]
         elif self.cutting_mod == 3:
             return self.leafs()
         raise ValueError
 
-    def get_graph_cut(self) -> GraphCut:
+    def get_graph_cut(self, global_vars: list[Var], check: bool = False) -> tuple[GraphCut, int]:
         nodes_indices = self.get_front_nodes_indices()
+        if check and not self.separates(nodes_indices):
+            return GraphCut(0, [], [], True), 0
 
+        # a bound change that is not a fixing of a binary variable can not be a literal
+        # of the clause, it is dropped and the cut holds only below its depth
         indices = []
         values = []
         number_of_negative = 0
         is_trivial = True
+        scope = 0
         for node_idx in nodes_indices:
+            node = self.nodes[node_idx]
+            global_var = global_vars[node.var_index]
+            if not global_var.is_general or global_var.lower < 0 or global_var.upper > 1 or \
+                    node.bound.lower != node.bound.upper:
+                scope = max(scope, node.depth)
+                continue
+
             if self.nodes[node_idx].bound.lower > 0:
                 number_of_negative += 1
                 values.append(-1)
             else:
                 values.append(1)
-            indices.append(self.nodes[node_idx].var.index)
+            indices.append(self.nodes[node_idx].var_index)
 
             if self.nodes[node_idx].iteration > 0:
                 is_trivial = False
 
-        return GraphCut(number_of_negative, indices, values, is_trivial)
+        return GraphCut(number_of_negative, indices, values, is_trivial), scope
@@ -0,0 +1,38 @@
+import json
+
+from graph import Graph
+
+
+class GraphRecorder:
+    def __init__(self, path: str, sample_rate: int = 1, buffer_size: int = 1 << 20) -> None:
+        self.file = open(path, "w", buffering=buffer_size)
+        self.sample_rate = sample_rate
+        self.number_of_graphs = 0
+
+    def record(self, graph: Graph, is_infeasible: bool) -> None:
+        self.number_of_graphs += 1
+        if (self.number_of_graphs - 1) % self.sample_rate != 0:
+            return
+
+        nodes, edges, origins = graph.to_plot_info()
+        data = {
+            "infeasible": is_infeasible,
+            "depth": graph.depth,
+            "nodes": {node_idx: [node.var_index, node.depth, node.iteration, node.bound.lower, node.bound.upper]
+                      for node_idx, node in nodes.items()},
+            "edges": edges,
+            "origins": origins,
+        }
+        self.file.write(json.dumps(data, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def load_graphs(path: str):
+    with open(path) as file:
+        for line in file:
+            data = json.loads(line)
+            data["nodes"] = {int(node_idx): node for node_idx,
+                             node in data["nodes"].items()}
+            yield data
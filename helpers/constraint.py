@@ -3,15 +3,112 @@ from bound import Bound
 from helpers.var import Var
 
 
-class Constraint:
-    def __init__(self, index: int, lower_bound: float, upper_bound: float) -> None:
+# the incremental activities are computed again from the terms after this many
+# updates, or when a removed term is this many times larger than the activity
+RECOMPUTE_INTERVAL = 256
+CANCELLATION_RATIO = 1e6
+
+
+class ConstraintMeta:
+    # the part of a row that is the same in every node, the copies share it
+    __slots__ = ("index", "origin_lower", "origin_upper", "scope", "is_graph_cut", "coeffs", "positions")
+
+    def __init__(self, index: int, origin_lower: float, origin_upper: float, scope: int,
+                 is_graph_cut: bool = False) -> None:
         self.index = index
+        self.origin_lower = origin_lower
+        self.origin_upper = origin_upper
+        self.scope = scope
+        # a row learned by the conflict analysis of the implication graph
+        self.is_graph_cut = is_graph_cut
+        self.coeffs: tuple[float, ...] = ()
+        # the position of every variable index in the row
+        self.positions: dict[int, int] = {}
+
+
+class Constraint:
+    __slots__ = ("meta", "index", "lower", "upper", "vars",
+                 "min_activity", "max_activity", "min_infinities", "max_infinities", "number_of_updates")
+
+    def __init__(self, index: int, lower_bound: float, upper_bound: float,
+                 origin_lower_bound: float | None = None, origin_upper_bound: float | None = None,
+                 scope: int = 0, meta: ConstraintMeta | None = None, is_graph_cut: bool = False) -> None:
+        # the bounds before any tightening by activity are valid in the whole tree,
+        # the scope is the depth of the ancestor the row is valid under
+        self.meta: ConstraintMeta = meta if meta is not None else ConstraintMeta(
+            index,
+            lower_bound if origin_lower_bound is None else origin_lower_bound,
+            upper_bound if origin_upper_bound is None else origin_upper_bound,
+            scope, is_graph_cut)
+        self.index: int = self.meta.index
         self.lower = lower_bound
         self.upper = upper_bound
-        self.info: dict[Var, float] = {}
-
-    def add_var(self, var: Var, coeff: float) -> None:
-        self.info[var] = coeff
+        # the variables of this node in the order of the shared coefficients
+        self.vars: tuple[Var, ...] = ()
+        # the finite parts of the activity bounds and the numbers of infinite terms,
+        # they follow every bound change of the variables
+        self.min_activity = 0.0
+        self.max_activity = 0.0
+        self.min_infinities = 0
+        self.max_infinities = 0
+        self.number_of_updates = 0
+
+    @property
+    def origin_lower(self) -> float:
+        return self.meta.origin_lower
+
+    @property
+    def origin_upper(self) -> float:
+        return self.meta.origin_upper
+
+    @property
+    def scope(self) -> int:
+        return self.meta.scope
+
+    def set_terms(self, vars: list[Var], coeffs: list[float]) -> None:
+        self.vars = tuple(vars)
+        self.meta.coeffs = tuple(coeffs)
+        self.meta.positions = {var.index: position for position, var in enumerate(vars)}
+        self.reset_activity()
+
+    def terms(self) -> zip:
+        return zip(self.vars, self.meta.coeffs)
+
+    def coeff(self, var: Var) -> float:
+        return self.meta.coeffs[self.meta.positions[var.index]]
+
+    def reset_activity(self) -> None:
+        self.min_activity = 0.0
+        self.max_activity = 0.0
+        self.min_infinities = 0
+        self.max_infinities = 0
+        self.number_of_updates = 0
+        for var, coeff in zip(self.vars, self.meta.coeffs):
+            self.__add_term(var.lower, var.upper, coeff, 1)
+
+    def on_bounds_change(self, var: Var, old_lower: float, old_upper: float) -> None:
+        coeff = self.coeff(var)
+        self.__add_term(old_lower, old_upper, coeff, -1)
+        self.__add_term(var.lower, var.upper, coeff, 1)
+        self.number_of_updates += 1
+
+        # the rounding errors of the sums would reach the rounded bounds of the variables
+        removed = max(0.0 if isinf(old_lower) else abs(old_lower * coeff),
+                      0.0 if isinf(old_upper) else abs(old_upper * coeff))
+        if self.number_of_updates >= RECOMPUTE_INTERVAL or \
+                removed > CANCELLATION_RATIO * max(1.0, abs(self.min_activity), abs(self.max_activity)):
+            self.reset_activity()
+
+    def __add_term(self, lower: float, upper: float, coeff: float, sign: int) -> None:
+        term = minmax(lower * coeff, upper * coeff)
+        if isinf(term[0]):
+            self.min_infinities += sign
+        else:
+            self.min_activity += sign * term[0]
+        if isinf(term[1]):
+            self.max_infinities += sign
+        else:
+            self.max_activity += sign * term[1]
 
     def update_lower_upper_by_activity(self) -> None:
         activity = self.activity()
@@ -21,20 +118,26 @@ class Constraint:
             self.upper = activity[1]
 
     def activity(self, without_var: Var | None = None) -> list[float, float]:
-        activity = [0, 0]
-        for (var, coeff) in self.info.items():
-            if without_var is not None and var == without_var:
-                continue
-            var_activity = minmax(
-                var.lower * coeff, var.upper * coeff)
-            activity[0] += var_activity[0]
-            activity[1] += var_activity[1]
-        return activity
+        min_activity, max_activity = self.min_activity, self.max_activity
+        min_infinities, max_infinities = self.min_infinities, self.max_infinities
+        if without_var is not None:
+            coeff = self.coeff(without_var)
+            term = minmax(without_var.lower * coeff, without_var.upper * coeff)
+            if isinf(term[0]):
+                min_infinities -= 1
+            else:
+                min_activity -= term[0]
+            if isinf(term[1]):
+                max_infinities -= 1
+            else:
+                max_activity -= term[1]
+        return [min_activity if min_infinities == 0 else float("-inf"),
+                max_activity if max_infinities == 0 else float("inf")]
 
     def update_vars(self, constrs_updates: list[dict[Var, Bound]]) -> bool:
         vars_for_update: dict[Var, Bound] = {}
 
-        for (var, coeff) in self.info.items():
+        for var, coeff in zip(self.vars, self.meta.coeffs):
             activity_without_var = self.activity(without_var=var)
             if coeff > 0:
                 new_bound = var.update_lower_upper(
@@ -63,17 +166,15 @@ class Constraint:
 
         # return vars_changed
 
-    def copy_empty(self):
-        return Constraint(
-            index=self.index,
-            lower_bound=self.lower,
-            upper_bound=self.upper
-        )
+    def copy(self, new_vars: list[Var]):
+        constr = Constraint(self.index, self.lower, self.upper, meta=self.meta)
+        constr.vars = tuple(new_vars[var_index] for var_index in self.meta.positions)
+        constr.reset_activity()
+        return constr
 
     def __repr__(self):
         line = ""
-        for var in self.info:
-            coeff = self.info[var]
+        for var, coeff in self.terms():
             if line == "":
                 line += f"{coeff} {var.name} " if coeff > 0 else f"-{str(coeff)[1:]} {var.name} "
             else:
@@ -1,13 +1,21 @@
+import numpy as np
+
+
 class GraphCut:
     def __init__(self,
                  number_of_negative: int,
-                 indices: list[int],
-                 values: list[float],
-                 is_trivial: bool) -> None:
+                 indices: np.ndarray | list[int],
+                 values: np.ndarray | list[float],
+                 is_trivial: bool,
+                 scope: list[tuple[int, float, float]] | None = None) -> None:
         self.number_of_negative = number_of_negative
-        self.indices = indices
-        self.values = values
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.values = np.asarray(values, dtype=np.float64)
         self.is_trivial = is_trivial
+        self.lower = 1 - number_of_negative
+        self.upper = float("inf")
+        # the branches of the node whose subtree the cut is valid in, empty for a global cut
+        self.scope = scope if scope is not None else []
 
     def is_empty(self) -> bool:
         return len(self.indices) == 0
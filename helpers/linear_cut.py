@@ -0,0 +1,15 @@
+class LinearCut:
+    def __init__(self,
+                 indices: list[int],
+                 values: list[float],
+                 lower: float,
+                 upper: float,
+                 scope: list[tuple[int, float, float]] | None = None) -> None:
+        self.indices = indices
+        self.values = values
+        self.lower = lower
+        self.upper = upper
+        self.scope = scope if scope is not None else []
+
+    def is_empty(self) -> bool:
+        return len(self.indices) == 0
@@ -1,10 +1,14 @@
 from math import isinf
 import highspy
+import numpy as np
 from bound import BnBBranch, Bound
 from helpers.var import Var
+from numpy_backend import BackendMismatch, is_primal
 
 
 class Solution:
+    __slots__ = ("value", "objective", "primal_tolerance", "status", "backend", "is_general", "is_primal")
+
     def __init__(self,
                  objective: float | None = None,
                  value: tuple[list[Var], list[float]] | None = None,
@@ -13,6 +17,8 @@ class Solution:
         self.objective = objective
         self.primal_tolerance = primal_tolerance
         self.status: highspy.HighsModelStatus | None = None
+        self.backend = "python"
+        self.is_general: np.ndarray | None = None
         self.is_primal: bool | None = self.__is_primal()
 
     def set_solution(self, objective: float, value: tuple[list[Var], list[float]], status: highspy.HighsModelStatus) -> bool:
@@ -35,14 +41,24 @@ class Solution:
         self.primal_tolerance = other.primal_tolerance
         self.is_primal = other.is_primal
         self.status = other.status
+        self.backend = other.backend
+        self.is_general = other.is_general
 
     def __is_primal(self) -> bool | None:
         if self.value is None or not self.is_feasible():
             return None
+        if self.backend == "numpy":
+            return is_primal(self.value[1], self.is_general, self.primal_tolerance)
+
+        result = True
         for var, val in zip(self.value[0], self.value[1]):
             if var.is_general and abs(val - round(val)) >= self.primal_tolerance:
-                return False
-        return True
+                result = False
+                break
+
+        if self.backend == "check" and is_primal(self.value[1], self.is_general, self.primal_tolerance) != result:
+            raise BackendMismatch("The numpy primal check differs from the python one")
+        return result
 
     def is_feasible(self) -> bool:
         return self.status == highspy.HighsModelStatus.kOptimal
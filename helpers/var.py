@@ -3,21 +3,48 @@ from math import ceil, floor, isinf
 from bound import Bound
 
 
+# the activities carry rounding errors, a bound that misses an integer by less
+# than this is rounded to it
+ROUNDING_TOLERANCE = 1e-9
+
+
+class VarMeta:
+    # the part of a variable that is the same in every node, the copies share it
+    __slots__ = ("index", "name", "is_general", "convergence_tolerance")
+
+    def __init__(self, index: int, name: str, is_general: bool, convergence_tolerance: float) -> None:
+        self.index = index
+        self.name = name
+        self.is_general = is_general
+        self.convergence_tolerance = convergence_tolerance
+
+
 class Var:
-    def __init__(self, index: int, name: str, lower_bound: float, upper_bound: float,
-                 is_general: bool, convergence_tolerance: float = 1e-6) -> None:
-        from helpers.constraint import Constraint
+    __slots__ = ("meta", "index", "is_general", "lower", "upper", "constraint_indices")
 
-        self.index: int = index
+    def __init__(self, index: int, name: str, lower_bound: float, upper_bound: float,
+                 is_general: bool, convergence_tolerance: float = 1e-6, meta: VarMeta | None = None) -> None:
+        self.meta: VarMeta = meta if meta is not None else VarMeta(
+            index, name, is_general, convergence_tolerance)
+        # the index and the integrality are read in every propagation, so they are
+        # kept next to the bounds as references to the shared objects
+        self.index: int = self.meta.index
+        self.is_general: bool = self.meta.is_general
         self.lower: float = lower_bound
         self.upper: float = upper_bound
-        self.in_constraints: list[Constraint] = []
-        self.is_general: bool = is_general
-        self.name: str = name
-        self.convergence_tolerance: float = convergence_tolerance
+        # the rows of the variable, the tuple is shared until a copy gets a new row
+        self.constraint_indices: tuple[int, ...] = ()
+
+    @property
+    def name(self) -> str:
+        return self.meta.name
+
+    @property
+    def convergence_tolerance(self) -> float:
+        return self.meta.convergence_tolerance
 
     def is_conv(self) -> bool:
-        return abs(self.upper - self.lower) <= self.convergence_tolerance
+        return abs(self.upper - self.lower) <= self.meta.convergence_tolerance
 
     def value(self) -> float | None:
         if not self.is_conv():
@@ -27,15 +54,15 @@ class Var:
         return (self.lower + self.upper) / 2
 
     def add_constraint(self, constr) -> None:
-        self.in_constraints.append(constr)
+        self.constraint_indices = self.constraint_indices + (constr.index,)
 
     def remove_last_constraint(self) -> None:
-        self.in_constraints.pop()
+        self.constraint_indices = self.constraint_indices[:-1]
 
     def update_lower_upper(self, new_lower: float, new_upper: float) -> Bound | None:
         updated_lower = None
         if self.is_general and not isinf(new_lower):
-            new_lower = ceil(new_lower)
+            new_lower = ceil(new_lower - ROUNDING_TOLERANCE)
             if new_lower > self.lower:
                 updated_lower = new_lower
         else:
@@ -44,7 +71,7 @@ class Var:
 
         updated_upper = None
         if self.is_general and not isinf(new_upper):
-            new_upper = floor(new_upper)
+            new_upper = floor(new_upper + ROUNDING_TOLERANCE)
             if new_upper < self.upper:
                 updated_upper = new_upper
         else:
@@ -62,7 +89,7 @@ class Var:
 
     def is_valid_update(self, new_lower: float, new_upper: float) -> bool:
         if self.is_general and not isinf(new_lower):
-            new_lower = ceil(new_lower)
+            new_lower = ceil(new_lower - ROUNDING_TOLERANCE)
             if new_lower > self.lower:
                 return True
         else:
@@ -70,7 +97,7 @@ class Var:
                 return True
 
         if self.is_general and not isinf(new_upper):
-            new_upper = floor(new_upper)
+            new_upper = floor(new_upper + ROUNDING_TOLERANCE)
             if new_upper < self.upper:
                 return True
         else:
@@ -79,15 +106,11 @@ class Var:
 
         return False
 
-    def copy_empty(self):
-        return Var(
-            index=self.index,
-            name=self.name,
-            lower_bound=self.lower,
-            upper_bound=self.upper,
-            is_general=self.is_general,
-            convergence_tolerance=self.convergence_tolerance
-        )
+    def copy(self):
+        var = Var(self.index, self.meta.name, self.lower, self.upper,
+                  self.is_general, meta=self.meta)
+        var.constraint_indices = self.constraint_indices
+        return var
 
     def __eq__(self, other):
         return self.index == other.index
@@ -0,0 +1,50 @@
+import resource
+from time import perf_counter
+
+
+class Limits:
+    def __init__(self,
+                 time_limit: float | None = None,
+                 node_limit: int | None = None,
+                 gap_limit: float | None = None,
+                 memory_limit: float | None = None,
+                 work_limit: int | None = None) -> None:
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.gap_limit = gap_limit
+        self.memory_limit = memory_limit
+        self.work_limit = work_limit
+        self.start_time = perf_counter()
+
+    def elapsed_time(self) -> float:
+        return perf_counter() - self.start_time
+
+    def is_time_exceeded(self) -> bool:
+        return self.time_limit is not None and self.elapsed_time() >= self.time_limit
+
+    def is_work_exceeded(self, work: int) -> bool:
+        return self.work_limit is not None and work >= self.work_limit
+
+    def check(self, number_of_nodes: int, gap: float | None, work: int = 0) -> str | None:
+        if self.is_time_exceeded():
+            return "time"
+        if self.node_limit is not None and number_of_nodes >= self.node_limit:
+            return "node"
+        if self.is_work_exceeded(work):
+            return "work"
+        if self.gap_limit is not None and gap is not None and gap <= self.gap_limit:
+            return "gap"
+        if self.memory_limit is not None and peak_memory() >= self.memory_limit:
+            return "memory"
+        return None
+
+
+class WorkCounter:
+    # the LP iterations measure the work the same way in every run, unlike the time
+    def __init__(self) -> None:
+        self.lp_iterations = 0
+
+
+def peak_memory() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
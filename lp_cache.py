@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from hashlib import blake2b
+import highspy
+import numpy as np
+
+from helpers.constraint import Constraint
+from helpers.var import Var
+
+
+# a python float list and the tuple of an entry cost about this much besides the values
+ENTRY_OVERHEAD = 256
+
+
+class LPResult:
+    def __init__(self, objective: float, status: highspy.HighsModelStatus, col_value: list[float]) -> None:
+        self.objective = objective
+        self.status = status
+        self.col_value = col_value
+        # the ray of an infeasible LP is taken only when it is asked for
+        self.dual_ray: list[float] | None = None
+
+    def size(self) -> int:
+        return ENTRY_OVERHEAD + 8 * (len(self.col_value) + (0 if self.dual_ray is None else len(self.dual_ray)))
+
+
+class LPCache:
+    # The relaxations of all nodes share one cache. A key is the hash of the rows of
+    # the model and of the current column and row bounds, the least recently used
+    # results are evicted once the results take more than max_memory megabytes.
+    def __init__(self, max_memory: float) -> None:
+        self.max_bytes = int(max_memory * 1024 * 1024)
+        self.bytes = 0
+        self.number_of_hits = 0
+        self.number_of_misses = 0
+        self.number_of_evictions = 0
+        self.__results: OrderedDict[bytes, LPResult] = OrderedDict()
+
+    def get(self, key: bytes) -> LPResult | None:
+        result = self.__results.get(key)
+        if result is None:
+            self.number_of_misses += 1
+            return None
+        self.number_of_hits += 1
+        self.__results.move_to_end(key)
+        return result
+
+    def put(self, key: bytes, result: LPResult) -> None:
+        old_result = self.__results.pop(key, None)
+        if old_result is not None:
+            self.bytes -= old_result.size()
+        self.__results[key] = result
+        self.bytes += result.size()
+        self.shrink()
+
+    def set_dual_ray(self, key: bytes, result: LPResult, dual_ray: list[float]) -> None:
+        old_size = result.size()
+        result.dual_ray = dual_ray
+        if self.__results.get(key) is result:
+            self.bytes += result.size() - old_size
+            self.shrink()
+
+    def shrink(self) -> None:
+        while self.bytes > self.max_bytes and len(self.__results) > 0:
+            _, result = self.__results.popitem(last=False)
+            self.bytes -= result.size()
+            self.number_of_evictions += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "hits": self.number_of_hits,
+            "misses": self.number_of_misses,
+            "evictions": self.number_of_evictions,
+            "entries": len(self.__results),
+            "bytes": self.bytes,
+        }
+
+    def __repr__(self, tabs: int = 0):
+        return "\t" * tabs + f"LPCache {{hits: {self.number_of_hits}, misses: {self.number_of_misses}, " + \
+            f"evictions: {self.number_of_evictions}, entries: {len(self.__results)}, memory: {self.bytes / 1024 / 1024:.2f} MB" + "}"
+
+
+def rows_signature(previous: bytes, indices: np.ndarray, values: np.ndarray, lower: float, upper: float) -> bytes:
+    return blake2b(previous + np.asarray(indices, dtype=np.int64).tobytes() +
+                   np.asarray(values, dtype=np.float64).tobytes() +
+                   np.array([lower, upper], dtype=np.float64).tobytes(), digest_size=16).digest()
+
+
+def bounds_key(rows: bytes, vars: list[Var], constraints: list[Constraint]) -> bytes:
+    bounds = np.array([bound for var in vars for bound in (var.lower, var.upper)] +
+                      [bound for constr in constraints for bound in (constr.lower, constr.upper)], dtype=np.float64)
+    return blake2b(rows + bounds.tobytes(), digest_size=16).digest()
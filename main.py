@@ -1,4 +1,5 @@
 import argparse
+from solver_args import add_solver_arguments, solver_kwargs
 
 if __name__ == "__main__":
 
@@ -8,44 +9,23 @@ if __name__ == "__main__":
                         help="Enable or disable the custom solver. (default = `enable`)")
     parser.add_argument("--highs", type=str, default="disable", choices=["enable", "disable"],
                         help="Enable or disable the Highs solver. (default = `disable`)")
-    parser.add_argument("--presolve", type=str, default="enable", choices=["enable", "disable"],
-                        help="Enable or disable presolving in the custom solver. (default = `enable`)")
-    parser.add_argument("--cutting", type=str, default="fuip", choices=["roots", "leafs", "fuip", "disable"],
-                        help="Cutting behaviour in the custom solver. (default = `fuip`)")
-    parser.add_argument("--cutting-check", type=str, default="disable", choices=["enable", "disable"],
-                        help="Enable or disable cutting check in the custom solver. (default = `disable`)")
-    parser.add_argument("--trivial-graph-cut", type=str, default="disable", choices=["enable", "disable"],
-                        help="Enable or disable trivial graph cuts in the custom solver. (default = `disable`)")
-    parser.add_argument("--silent", type=str, default="enable", choices=["enable", "disable"],
-                        help="Enable or disable writing info from the custom solver. (default = `enable`)")
-    parser.add_argument("--fuip-size", type=int, default=1,
-                        help="Size of FUIP group in the custom solver. (default = `1`)")
-    parser.add_argument("--use-dropped", type=str, default="disable", choices=["enable", "disable"],
-                        help="Enable or disable using the dropped nodes like infeasible in the custom solver. (default = `disable`)")
+    add_solver_arguments(parser)
+    parser.add_argument("--profile-json", type=str, default=None,
+                        help="Path to the JSON dump of the solver phase timings. (default = `None`)")
     args = parser.parse_args()
 
     if args.solver == "enable":
         from solver import Solver
 
-        cutting_mod = 0
-        if args.cutting == "fuip":
-            cutting_mod = 1
-        elif args.cutting == "roots":
-            cutting_mod = 2
-        elif args.cutting == "leafs":
-            cutting_mod = 3
-
-        sl = Solver(path_to_problem=args.problem,
-                    with_presolve=args.presolve == "enable",
-                    cutting_check=args.cutting_check == "enable",
-                    cutting_mod=cutting_mod,
-                    trivial_graph_cut=args.trivial_graph_cut == "enable",
-                    use_dropped=args.use_dropped == "enable",
-                    silent=args.silent == "enable",
-                    fuip_size=args.fuip_size)
+        sl = Solver(path_to_problem=args.problem, **solver_kwargs(args))
         sl.solve()
         print(sl.result())
 
+        if args.profile_json is not None and sl.result().profiler is not None:
+            import json
+            with open(args.profile_json, "w") as file:
+                json.dump(sl.result().profiler.to_dict(), file, indent=1)
+
     if args.highs == "enable":
         from highspy import Highs
 
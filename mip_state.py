@@ -1,6 +1,13 @@
 from extended_highs_model import Solution
 from enum import Enum, auto
+from adaptive import AdaptiveController
+from certificate import InfeasibilityCertificate
+from restart import RestartPolicy
 from node import Branchability, Node
+from limits import WorkCounter
+from lp_cache import LPCache
+from profiler import Profiler
+from separation import RootSeparator
 
 
 class BranchabilityStatistic:
@@ -24,6 +31,7 @@ class State(Enum):
     InSolving = auto()
     Converged = auto()
     Infeasible = auto()
+    LimitReached = auto()
 
 
 class MipState:
@@ -32,13 +40,30 @@ class MipState:
         self.primal_solution: Solution = Solution()
         self.dual_solution: Solution = Solution()
         self.convergence_tolerance = convergence_tolerance
+        self.reached_limit: str | None = None
+        self.profiler: Profiler | None = None
+        self.lp_cache: LPCache | None = None
+        self.separator: RootSeparator | None = None
+        self.adaptive: AdaptiveController | None = None
+        self.certificate: InfeasibilityCertificate | None = None
+        self.restart_policy: RestartPolicy | None = None
+        self.work = WorkCounter()
 
+        self.number_of_nodes = 0
         self.number_of_branches = 0
         self.branchability_statistic = BranchabilityStatistic()
         self.number_of_relaxations = 0
         self.number_of_non_trivial_graph_cuts = 0
         self.number_of_objective_changes = 0
         self.number_of_resolved_nodes = 0
+        self.number_of_symmetry_rows = 0
+        self.number_of_dual_ray_cuts = 0
+        self.number_of_local_cuts = 0
+        self.number_of_restarts = 0
+        self.number_of_strong_branching_fixings = 0
+        self.number_of_root_cuts = 0
+        # all learned cuts, the conflicts that trigger the restarts
+        self.number_of_cuts = 0
 
     def __check_convergency(self) -> None:
         if self.primal_solution.objective is None or self.dual_solution.objective is None:
@@ -50,7 +75,21 @@ class MipState:
             self.state = State.Converged
             return
 
+    def gap(self) -> float | None:
+        if self.primal_solution.objective is None or self.dual_solution.objective is None:
+            return None
+        if self.primal_solution.objective <= self.dual_solution.objective:
+            return 0.0
+        return (self.primal_solution.objective - self.dual_solution.objective) \
+            / max(abs(self.dual_solution.objective), abs(self.primal_solution.objective))
+
+    def set_limit_reached(self, limit: str) -> None:
+        self.reached_limit = limit
+        self.state = State.LimitReached
+
     def on_end(self) -> None:
+        if self.state == State.LimitReached:
+            return
         if self.primal_solution.objective is None:
             self.state = State.Infeasible
             self.dual_solution = Solution()
@@ -76,6 +115,33 @@ class MipState:
         return (self.primal_solution.objective - node.exh.solution.objective) \
             / max(abs(self.primal_solution.objective), abs(node.exh.solution.objective)) > self.convergence_tolerance
 
+    def to_dict(self) -> dict:
+        return {
+            "state": self.state.name,
+            "reached_limit": self.reached_limit,
+            "primal": self.primal_solution.objective,
+            "dual": self.dual_solution.objective,
+            "gap": self.gap(),
+            "nodes": self.number_of_nodes,
+            "branches": self.number_of_branches,
+            "relaxations": self.number_of_relaxations,
+            "lp_iterations": self.work.lp_iterations,
+            "non_trivial_graph_cuts": self.number_of_non_trivial_graph_cuts,
+            "objective_changes": self.number_of_objective_changes,
+            "resolved_nodes": self.number_of_resolved_nodes,
+            "symmetry_rows": self.number_of_symmetry_rows,
+            "dual_ray_cuts": self.number_of_dual_ray_cuts,
+            "local_cuts": self.number_of_local_cuts,
+            "restarts": self.number_of_restarts,
+            "strong_branching_fixings": self.number_of_strong_branching_fixings,
+            "root_cuts": self.number_of_root_cuts,
+            "branchability": {item.name: value for item, value in self.branchability_statistic.statistic.items()},
+            "phases": None if self.profiler is None else self.profiler.to_dict(),
+            "lp_cache": None if self.lp_cache is None else self.lp_cache.to_dict(),
+            "separation": None if self.separator is None else self.separator.to_dict(),
+            "adaptive": None if self.adaptive is None else self.adaptive.to_dict(),
+        }
+
     def __repr__(self):
         if self.primal_solution.objective is None:
             text = f"MipState [{self.state}] {{\n\tprimal value: None"
@@ -97,11 +163,30 @@ class MipState:
             else:
                 text += "\n\tdual solution: [" + ", ".join(map(str, self.dual_solution.value[1][:10])) + ", ..., " + ", ".join(
                     map(str, self.dual_solution.value[1][-10:])) + "]"
+        if self.state == State.LimitReached:
+            text += f"\n\treached limit: {self.reached_limit}"
+            text += f"\n\tgap: {self.gap()}"
+        text += f"\n\tnumber of nodes: {self.number_of_nodes}"
         text += f"\n\tnumber of branches: {self.number_of_branches}"
         text += f"\n\tnumber of relaxations: {self.number_of_relaxations}"
+        text += f"\n\tnumber of lp iterations: {self.work.lp_iterations}"
         text += f"\n\tnumber of non trivial graph cuts: {self.number_of_non_trivial_graph_cuts}"
         text += f"\n\tnumber of objective changes: {self.number_of_objective_changes}"
         text += f"\n\tnumber of resolved nodes: {self.number_of_resolved_nodes}"
+        text += f"\n\tnumber of symmetry rows: {self.number_of_symmetry_rows}"
+        text += f"\n\tnumber of dual ray cuts: {self.number_of_dual_ray_cuts}"
+        text += f"\n\tnumber of local cuts: {self.number_of_local_cuts}"
+        text += f"\n\tnumber of restarts: {self.number_of_restarts}"
+        text += f"\n\tnumber of strong branching fixings: {self.number_of_strong_branching_fixings}"
+        text += f"\n\tnumber of root cuts: {self.number_of_root_cuts}"
         text += "\n" + self.branchability_statistic.__repr__(1)
+        if self.profiler is not None:
+            text += "\n" + self.profiler.__repr__(1)
+        if self.lp_cache is not None:
+            text += "\n" + self.lp_cache.__repr__(1)
+        if self.separator is not None:
+            text += "\n" + self.separator.__repr__(1)
+        if self.adaptive is not None:
+            text += "\n" + self.adaptive.__repr__(1)
         text += "\n}"
         return text
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import highspy
+import numpy as np
+
+
+SNAPSHOT_VERSION = 1
+ARRAYS = ["col_cost", "col_lower", "col_upper", "integrality",
+          "row_lower", "row_upper", "a_start", "a_index", "a_value",
+          "col_names", "row_names"]
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_path(snapshot_dir: str, path_to_problem: str) -> str:
+    return os.path.join(snapshot_dir, f"{file_hash(path_to_problem)}-v{SNAPSHOT_VERSION}")
+
+
+def lp_to_arrays(lp: highspy.HighsLp) -> dict[str, np.ndarray]:
+    integrality = np.zeros(lp.num_col_, dtype=np.int8)
+    if len(lp.integrality_) > 0:
+        integrality[:] = [int(var_type) for var_type in lp.integrality_]
+
+    return {
+        "col_cost": np.asarray(lp.col_cost_, dtype=np.float64),
+        "col_lower": np.asarray(lp.col_lower_, dtype=np.float64),
+        "col_upper": np.asarray(lp.col_upper_, dtype=np.float64),
+        "integrality": integrality,
+        "row_lower": np.asarray(lp.row_lower_, dtype=np.float64),
+        "row_upper": np.asarray(lp.row_upper_, dtype=np.float64),
+        "a_start": np.asarray(lp.a_matrix_.start_, dtype=np.int64),
+        "a_index": np.asarray(lp.a_matrix_.index_, dtype=np.int64),
+        "a_value": np.asarray(lp.a_matrix_.value_, dtype=np.float64),
+        "col_names": np.asarray(lp.col_names_, dtype=np.str_),
+        "row_names": np.asarray(lp.row_names_, dtype=np.str_),
+    }
+
+
+def save_snapshot(path: str, lp: highspy.HighsLp) -> None:
+    # every writer gets its own directory, the instance can be loaded by several workers
+    temp_path = tempfile.mkdtemp(dir=os.path.dirname(path))
+    for name, array in lp_to_arrays(lp).items():
+        np.save(os.path.join(temp_path, name + ".npy"), array)
+    with open(os.path.join(temp_path, "meta.json"), "w") as file:
+        json.dump({"sense": int(lp.sense_), "offset": lp.offset_}, file)
+    # another writer can be first, its snapshot of the same file is kept
+    if os.path.isdir(path):
+        shutil.rmtree(temp_path, ignore_errors=True)
+        return
+    try:
+        os.replace(temp_path, path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+        shutil.rmtree(temp_path, ignore_errors=True)
+
+
+def load_snapshot(path: str) -> tuple[dict[str, np.ndarray], highspy.HighsLp]:
+    arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+              for name in ARRAYS}
+    with open(os.path.join(path, "meta.json")) as file:
+        meta = json.load(file)
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = len(arrays["col_cost"])
+    lp.num_row_ = len(arrays["row_lower"])
+    lp.sense_ = highspy.ObjSense(meta["sense"])
+    lp.offset_ = meta["offset"]
+    lp.col_cost_ = arrays["col_cost"]
+    lp.col_lower_ = arrays["col_lower"]
+    lp.col_upper_ = arrays["col_upper"]
+    lp.row_lower_ = arrays["row_lower"]
+    lp.row_upper_ = arrays["row_upper"]
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.num_col_ = lp.num_col_
+    lp.a_matrix_.num_row_ = lp.num_row_
+    lp.a_matrix_.start_ = arrays["a_start"]
+    lp.a_matrix_.index_ = arrays["a_index"]
+    lp.a_matrix_.value_ = arrays["a_value"]
+    lp.col_names_ = arrays["col_names"].tolist()
+    lp.row_names_ = arrays["row_names"].tolist()
+    return arrays, lp
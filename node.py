@@ -11,9 +11,29 @@ class Branchability(Enum):
 
 
 class Node:
-    def __init__(self, exh: ExtendedHighsModel):
+    def __init__(self, exh: ExtendedHighsModel, branches: list[tuple[int, float, float]] | None = None,
+                 fixings: list[tuple[int, int, float, float]] | None = None):
         self.exh = exh
         self.branchability = Branchability.Unknown
+        self.branches = branches if branches is not None else []
+        # the strong-branching fixings of the ancestors as (depth, var index, lower, upper)
+        self.fixings = fixings if fixings is not None else []
+        self.id = 0
+
+
+class BranchSelection:
+    def __init__(self, parent: Node) -> None:
+        self.parent = parent
+        self.max_diff = 0
+        self.nodes: tuple[Node, Node] = ()
+
+    def add(self, left_node: Node, right_node: Node) -> None:
+        for child_node in (left_node, right_node):
+            if child_node.branchability == Branchability.Branchable or len(self.nodes) == 0:
+                diff = child_node.exh.solution.objective - self.parent.exh.solution.objective
+                if diff >= self.max_diff or len(self.nodes) == 0:
+                    self.max_diff = diff
+                    self.nodes = (left_node, right_node)
 
 
 def sort_nodes(left_node: Node, right_node: Node) -> tuple[Node, Node]:
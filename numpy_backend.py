@@ -0,0 +1,124 @@
+from math import isinf
+import numpy as np
+
+from bound import Bound
+from helpers.constraint import Constraint
+from helpers.var import ROUNDING_TOLERANCE, Var
+
+
+BACKENDS = ["python", "numpy", "auto", "check"]
+
+# below this number of nonzeros the overhead of gathering the arrays is larger
+# than the time of the python loops
+AUTO_MIN_NONZEROS = 100
+
+
+class BackendMismatch(Exception):
+    pass
+
+
+def resolve_backend(backend: str, number_of_nonzeros: int) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend `{backend}`")
+    if backend == "auto":
+        return "numpy" if number_of_nonzeros >= AUTO_MIN_NONZEROS else "python"
+    return backend
+
+
+class MatrixArrays:
+    # The constraint matrix in row order, the entries of a row keep the order of
+    # Constraint.vars, so the updates come out in the order of the python loops.
+    def __init__(self, rows: np.ndarray, cols: np.ndarray, coeffs: np.ndarray, is_general: np.ndarray) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.coeffs = coeffs
+        self.is_general = is_general
+
+    @staticmethod
+    def from_constraints(vars: list[Var], constraints: list[Constraint]):
+        rows = []
+        cols = []
+        coeffs = []
+        for constr in constraints:
+            for var, coeff in constr.terms():
+                rows.append(constr.index)
+                cols.append(var.index)
+                coeffs.append(coeff)
+        return MatrixArrays(np.array(rows, dtype=np.int64),
+                            np.array(cols, dtype=np.int64),
+                            np.array(coeffs, dtype=np.float64),
+                            np.array([var.is_general for var in vars], dtype=bool))
+
+    def with_rows(self, constraints: list[Constraint]):
+        added = MatrixArrays.from_constraints([], constraints)
+        return MatrixArrays(np.concatenate([self.rows, added.rows]),
+                            np.concatenate([self.cols, added.cols]),
+                            np.concatenate([self.coeffs, added.coeffs]),
+                            self.is_general)
+
+
+def candidate_bounds(arrays: MatrixArrays, vars: list[Var], constraints: list[Constraint]) -> list[dict[Var, Bound]] | None:
+    # the same arithmetic as Constraint.update_vars on all entries at once
+    var_lower = np.array([var.lower for var in vars], dtype=np.float64)
+    var_upper = np.array([var.upper for var in vars], dtype=np.float64)
+    row_state = np.array([(constr.lower, constr.upper, constr.min_activity, constr.max_activity,
+                           constr.min_infinities, constr.max_infinities) for constr in constraints],
+                         dtype=np.float64).reshape(-1, 6)
+
+    rows, cols, coeffs = arrays.rows, arrays.cols, arrays.coeffs
+    lower = var_lower[cols]
+    upper = var_upper[cols]
+    row_lower, row_upper, min_activity, max_activity, min_infinities, max_infinities = \
+        (row_state[rows, column] for column in range(6))
+
+    with np.errstate(invalid="ignore"):
+        first_term = lower * coeffs
+        second_term = upper * coeffs
+        min_term = np.where(first_term <= second_term, first_term, second_term)
+        max_term = np.where(first_term <= second_term, second_term, first_term)
+
+        min_is_inf = np.isinf(min_term)
+        max_is_inf = np.isinf(max_term)
+        min_without_var = np.where(min_infinities - min_is_inf == 0,
+                                   np.where(min_is_inf, min_activity, min_activity - min_term), -np.inf)
+        max_without_var = np.where(max_infinities - max_is_inf == 0,
+                                   np.where(max_is_inf, max_activity, max_activity - max_term), np.inf)
+
+        is_positive = coeffs > 0
+        new_lower = np.where(is_positive, row_lower - max_without_var,
+                             row_upper - min_without_var) / coeffs
+        new_upper = np.where(is_positive, row_upper - min_without_var,
+                             row_lower - max_without_var) / coeffs
+
+        is_general = arrays.is_general[cols]
+        new_lower = np.where(is_general & np.isfinite(new_lower), np.ceil(new_lower - ROUNDING_TOLERANCE), new_lower)
+        new_upper = np.where(is_general & np.isfinite(new_upper), np.floor(new_upper + ROUNDING_TOLERANCE), new_upper)
+
+        lower_updated = new_lower > lower
+        upper_updated = new_upper < upper
+
+    updated = np.flatnonzero(lower_updated | upper_updated)
+    bound_lower = np.where(lower_updated, new_lower, lower)[updated]
+    bound_upper = np.where(upper_updated, new_upper, upper)[updated]
+    if np.any(bound_lower > bound_upper):
+        return None
+
+    constrs_updates: list[dict[Var, Bound]] = [{} for _ in constraints]
+    for entry, lower_value, upper_value in zip(updated.tolist(), bound_lower.tolist(), bound_upper.tolist()):
+        var = vars[cols[entry]]
+        # the python path keeps the untouched bound object and rounds to int
+        if not lower_updated[entry]:
+            lower_value = var.lower
+        elif var.is_general and not isinf(lower_value):
+            lower_value = int(lower_value)
+        if not upper_updated[entry]:
+            upper_value = var.upper
+        elif var.is_general and not isinf(upper_value):
+            upper_value = int(upper_value)
+        constrs_updates[rows[entry]][var] = Bound(lower_value, upper_value)
+    return constrs_updates
+
+
+def is_primal(values: list[float], is_general: np.ndarray, primal_tolerance: float) -> bool:
+    values = np.asarray(values, dtype=np.float64)[is_general]
+    return not np.any(np.abs(values - np.round(values)) >= primal_tolerance)
@@ -0,0 +1,78 @@
+from array import array
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Callable
+
+
+PHASES = ["lp_solve", "propagation", "model_copy", "fuip",
+          "cut_insertion", "strong_branching", "root_separation"]
+
+
+class PhaseStatistic:
+    def __init__(self):
+        self.durations = array("d")
+
+    def add(self, duration: float) -> None:
+        self.durations.append(duration)
+
+    def total(self) -> float:
+        return sum(self.durations)
+
+    def percentile(self, q: float) -> float:
+        if len(self.durations) == 0:
+            return 0.0
+        durations = sorted(self.durations)
+        return durations[min(len(durations) - 1, int(q * len(durations)))]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": len(self.durations),
+            "total": self.total(),
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": max(self.durations, default=0.0),
+        }
+
+
+# The phases are measured by the objects that hold the profiler, so solvers in one
+# process do not see the calls of each other. Times of nested phases are inclusive.
+class Profiler:
+    def __init__(self):
+        self.phases: dict[str, PhaseStatistic] = {
+            phase: PhaseStatistic() for phase in PHASES}
+
+    @contextmanager
+    def measure(self, phase: str):
+        start_time = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase].add(perf_counter() - start_time)
+
+    def timed(self, phase: str, function: Callable) -> Callable:
+        statistic = self.phases[phase]
+
+        def timed_function(*args, **kwargs):
+            start_time = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                statistic.add(perf_counter() - start_time)
+        return timed_function
+
+    def to_dict(self) -> dict:
+        return {phase: statistic.to_dict() for phase, statistic in self.phases.items()}
+
+    def __repr__(self, tabs: int = 0):
+        text = "\t" * tabs + "Profiler {\n"
+        for phase, statistic in self.phases.items():
+            info = statistic.to_dict()
+            text += "\t" * tabs + f"\t{phase}: count: {info['count']}, total: {info['total']:.4f}s, " + \
+                f"p50: {info['p50'] * 1e3:.3f}ms, p90: {info['p90'] * 1e3:.3f}ms, p99: {info['p99'] * 1e3:.3f}ms\n"
+        text += "\t" * tabs + "}"
+        return text
+
+
+def measure(profiler: Profiler | None, phase: str):
+    return nullcontext() if profiler is None else profiler.measure(phase)
@@ -0,0 +1,39 @@
+import sys
+from time import perf_counter
+
+from mip_state import MipState
+
+
+class ProgressReporter:
+    def __init__(self, interval: float = 1.0, file=sys.stdout) -> None:
+        self.interval = interval
+        self.file = file
+        self.start_time = perf_counter()
+        self.last_time: float | None = None
+        self.last_number_of_nodes = 0
+
+    def report(self, mip_state: MipState, number_of_open_nodes: int, force: bool = False) -> None:
+        now = perf_counter()
+        if not force and self.last_time is not None and now - self.last_time < self.interval:
+            return
+
+        if self.last_time is None:
+            print(f"{'time':>9} {'nodes':>9} {'open':>9} {'primal':>16} {'dual':>16} {'gap':>9} {'nodes/s':>9}",
+                  file=self.file)
+            self.last_time = self.start_time
+
+        elapsed = now - self.last_time
+        nodes_per_second = (mip_state.number_of_nodes - self.last_number_of_nodes) / \
+            elapsed if elapsed > 0 else 0.0
+        gap = mip_state.gap()
+        print(f"{now - self.start_time:>8.1f}s {mip_state.number_of_nodes:>9} {number_of_open_nodes:>9} "
+              f"{format_value(mip_state.primal_solution.objective):>16} {format_value(mip_state.dual_solution.objective):>16} "
+              f"{'-' if gap is None else f'{gap * 100:.2f}%':>9} {nodes_per_second:>9.1f}",
+              file=self.file, flush=True)
+
+        self.last_time = now
+        self.last_number_of_nodes = mip_state.number_of_nodes
+
+
+def format_value(value: float | None) -> str:
+    return "-" if value is None else f"{value:.6g}"
@@ -0,0 +1,39 @@
+class RestartPolicy:
+    def __init__(self, strategy: str, trigger: str = "conflicts", base: int = 100, factor: float = 2.0) -> None:
+        self.strategy = strategy
+        self.trigger = trigger
+        self.base = base
+        self.factor = factor
+        self.number_of_restarts = 0
+        self.last_count = 0
+
+    def threshold(self) -> float:
+        if self.strategy == "luby":
+            return self.base * luby(self.number_of_restarts + 1)
+        if self.strategy == "geometric":
+            return self.base * self.factor ** self.number_of_restarts
+        raise ValueError
+
+    def should_restart(self, number_of_nodes: int, number_of_conflicts: int) -> bool:
+        count = number_of_nodes if self.trigger == "nodes" else number_of_conflicts
+        if count - self.last_count < self.threshold():
+            return False
+        self.number_of_restarts += 1
+        self.last_count = count
+        return True
+
+    def state(self) -> dict:
+        return {"number_of_restarts": self.number_of_restarts, "last_count": self.last_count}
+
+    def load_state(self, state: dict) -> None:
+        self.number_of_restarts = state["number_of_restarts"]
+        self.last_count = state["last_count"]
+
+
+def luby(index: int) -> int:
+    power = 1
+    while (1 << power) - 1 < index:
+        power += 1
+    if index == (1 << power) - 1:
+        return 1 << (power - 1)
+    return luby(index - (1 << (power - 1)) + 1)
@@ -0,0 +1,330 @@
+from math import floor, isinf, sqrt
+import highspy
+import numpy as np
+
+from helpers.linear_cut import LinearCut
+from numpy_backend import MatrixArrays
+
+
+# a row is a knapsack over literals, a literal is a binary column or its complement
+Literal = tuple[int, bool]
+
+
+class RootSeparator:
+    # The root relaxation is tightened in rounds: the cuts of all families are
+    # separated from the current LP solution, the most efficacious of them that are
+    # not almost parallel to each other are added, and the LP is solved again. The
+    # loop stops when no cut is found or the bound stalls for several rounds.
+    def __init__(self,
+                 max_rounds: int = 10,
+                 max_cuts_per_round: int = 50,
+                 min_efficacy: float = 1e-4,
+                 max_parallelism: float = 0.95,
+                 stall_rounds: int = 3,
+                 stall_tolerance: float = 1e-6,
+                 min_fractionality: float = 0.01,
+                 max_dynamism: float = 1e6,
+                 max_clique_row_size: int = 500) -> None:
+        self.max_rounds = max_rounds
+        self.max_cuts_per_round = max_cuts_per_round
+        self.min_efficacy = min_efficacy
+        self.max_parallelism = max_parallelism
+        self.stall_rounds = stall_rounds
+        self.stall_tolerance = stall_tolerance
+        self.min_fractionality = min_fractionality
+        self.max_dynamism = max_dynamism
+        self.max_clique_row_size = max_clique_row_size
+
+        self.number_of_rounds = 0
+        self.number_of_cuts = {"gomory": 0, "cover": 0, "clique": 0}
+        self.start_objective: float | None = None
+        self.end_objective: float | None = None
+
+    def separate(self, exh) -> list[LinearCut]:
+        added: list[LinearCut] = []
+        if not exh.solution.is_feasible():
+            return added
+        self.start_objective = self.end_objective = exh.solution.objective
+        knapsacks = self.__knapsack_rows(exh)
+        conflicts = self.__conflict_graph(knapsacks)
+
+        number_of_stalled_rounds = 0
+        for _ in range(self.max_rounds):
+            if not exh.solution.is_feasible() or exh.solution.is_primal:
+                break
+            # a cached LP result does not leave its basis in highs
+            exh.run()
+            exh.count_work()
+            x = np.array(exh.getSolution().col_value, dtype=np.float64)
+
+            candidates = [(family, cut) for family, family_cuts in (
+                ("gomory", self.gomory_cuts(exh, x)),
+                ("cover", self.cover_cuts(knapsacks, x)),
+                ("clique", self.clique_cuts(conflicts, x))) for cut in family_cuts]
+            selected = self.__filter(candidates, x)
+            if len(selected) == 0:
+                break
+
+            self.number_of_rounds += 1
+            for family, _ in selected:
+                self.number_of_cuts[family] += 1
+            cuts = [cut for _, cut in selected]
+            exh.add_rows(cuts)
+            added.extend(cuts)
+
+            previous_objective = exh.solution.objective
+            exh.solve()
+            if not exh.solution.is_feasible():
+                break
+            self.end_objective = exh.solution.objective
+            if self.end_objective - previous_objective <= self.stall_tolerance * max(1.0, abs(previous_objective)):
+                number_of_stalled_rounds += 1
+                if number_of_stalled_rounds >= self.stall_rounds:
+                    break
+            else:
+                number_of_stalled_rounds = 0
+        return added
+
+    def gomory_cuts(self, exh, x: np.ndarray) -> list[LinearCut]:
+        # A tableau row reads x_b + sum a_k y_k = 0 over the nonbasic columns and
+        # row activities y_k. Shifting every y_k to its active bound gives
+        # x_b + sum a'_k t_k = x*_b with t_k >= 0, the GMI cut of it is mapped back
+        # to the columns by expanding the row activities.
+        vars = exh.vars
+        constraints = exh.constraints
+        basis = exh.getBasis()
+        col_status = basis.col_status
+        row_status = basis.row_status
+        basic = exh.getBasicVariables()[1]
+        arrays = MatrixArrays.from_constraints(vars, constraints)
+
+        sources = []
+        for row, var_index in enumerate(basic.tolist()):
+            if var_index < 0 or not vars[var_index].is_general:
+                continue
+            fractionality = x[var_index] - floor(x[var_index])
+            if self.min_fractionality <= fractionality <= 1 - self.min_fractionality:
+                sources.append((abs(fractionality - 0.5), row, var_index))
+        sources.sort()
+
+        col_bounds = [self.__active_bound(status, var.lower, var.upper)
+                      for status, var in zip(col_status, vars)]
+        row_bounds = [self.__active_bound(status, constr.lower, constr.upper)
+                      for status, constr in zip(row_status, constraints)]
+
+        cuts = []
+        for _, row, var_index in sources[:self.max_cuts_per_round]:
+            reduced_row = np.asarray(exh.getReducedRow(row)[1], dtype=np.float64)
+            inverse_row = np.asarray(exh.getBasisInverseRow(row)[1], dtype=np.float64)
+            cut = self.__gmi_cut(vars, arrays, x[var_index], var_index,
+                                 reduced_row, -inverse_row, col_bounds, row_bounds)
+            if cut is not None:
+                cuts.append(cut)
+        return cuts
+
+    @staticmethod
+    def __active_bound(status: highspy.HighsBasisStatus, lower: float, upper: float) -> tuple[float, float] | None:
+        # the bound a nonbasic item sits at and the sign of its shift, a fixed item has no shift
+        if status == highspy.HighsBasisStatus.kBasic:
+            return 0.0, 0.0
+        if lower == upper:
+            return lower, 0.0
+        if status == highspy.HighsBasisStatus.kLower and not isinf(lower):
+            return lower, 1.0
+        if status == highspy.HighsBasisStatus.kUpper and not isinf(upper):
+            return upper, -1.0
+        return None
+
+    def __gmi_cut(self, vars, arrays: MatrixArrays, basic_value: float, basic_index: int,
+                  col_coeffs: np.ndarray, row_coeffs: np.ndarray,
+                  col_bounds: list[tuple[float, float] | None],
+                  row_bounds: list[tuple[float, float] | None]) -> LinearCut | None:
+        f0 = basic_value - floor(basic_value)
+        col_cut = np.zeros(len(vars), dtype=np.float64)
+        row_cut = np.zeros(len(row_coeffs), dtype=np.float64)
+        rhs = 1.0
+
+        for is_col, coeffs, bounds, cut in ((True, col_coeffs, col_bounds, col_cut),
+                                            (False, row_coeffs, row_bounds, row_cut)):
+            for index in np.flatnonzero(np.abs(coeffs) > 1e-9).tolist():
+                if is_col and index == basic_index:
+                    continue
+                bound = bounds[index]
+                if bound is None:
+                    return None
+                value, sign = bound
+                if sign == 0.0:
+                    continue
+                shifted = sign * coeffs[index]
+                if is_col and vars[index].is_general and value == floor(value):
+                    fraction = shifted - floor(shifted)
+                    weight = fraction / f0 if fraction <= f0 else (1 - fraction) / (1 - f0)
+                else:
+                    weight = shifted / f0 if shifted >= 0 else -shifted / (1 - f0)
+                # weight * t >= ... with t = sign * (y - value)
+                cut[index] = weight * sign
+                rhs += weight * sign * value
+
+        values = col_cut + np.bincount(arrays.cols, weights=arrays.coeffs * row_cut[arrays.rows],
+                                       minlength=len(vars))
+        return self.__clean(vars, values, rhs)
+
+    def __clean(self, vars, values: np.ndarray, rhs: float) -> LinearCut | None:
+        # tiny coefficients are moved to the right-hand side with the bounds of their columns
+        largest = np.max(np.abs(values), initial=0.0)
+        if largest <= 1e-9:
+            return None
+        for index in np.flatnonzero((values != 0) & (np.abs(values) < 1e-9 * largest)).tolist():
+            var = vars[index]
+            term = max(values[index] * var.lower, values[index] * var.upper)
+            if isinf(term):
+                continue
+            rhs -= term
+            values[index] = 0.0
+        indices = np.flatnonzero(values)
+        magnitudes = np.abs(values[indices])
+        if np.max(magnitudes) > self.max_dynamism * np.min(magnitudes):
+            return None
+        return LinearCut(indices.tolist(), values[indices].tolist(), rhs, float("inf"))
+
+    def __knapsack_rows(self, exh) -> list[tuple[list[Literal], list[float], float]]:
+        # every finite side of a row over binary columns as sum w_j z_j <= b with w_j > 0
+        knapsacks = []
+        for constr in exh.constraints:
+            if not all(var.is_general and var.lower >= 0 and var.upper <= 1 for var in constr.vars):
+                continue
+            for side, bound in ((1.0, constr.upper), (-1.0, -constr.lower)):
+                if isinf(bound):
+                    continue
+                literals = []
+                weights = []
+                capacity = bound
+                for var, coeff in constr.terms():
+                    coeff *= side
+                    if var.lower == var.upper:
+                        capacity -= coeff * var.lower
+                    elif coeff > 0:
+                        literals.append((var.index, False))
+                        weights.append(coeff)
+                    elif coeff < 0:
+                        literals.append((var.index, True))
+                        weights.append(-coeff)
+                        capacity -= coeff
+                if len(literals) > 1 and sum(weights) > capacity + 1e-9:
+                    knapsacks.append((literals, weights, capacity))
+        return knapsacks
+
+    def cover_cuts(self, knapsacks: list[tuple[list[Literal], list[float], float]], x: np.ndarray) -> list[LinearCut]:
+        # a greedy minimal cover C gives sum_C z <= |C| - 1, it is lifted to the
+        # extended cover with every literal at least as heavy as the heaviest of C
+        cuts = []
+        for literals, weights, capacity in knapsacks:
+            values = [literal_value(literal, x) for literal in literals]
+            order = sorted(range(len(literals)), key=lambda item: (1 - values[item]) / weights[item])
+            cover = []
+            total = 0.0
+            for item in order:
+                cover.append(item)
+                total += weights[item]
+                if total > capacity + 1e-9:
+                    break
+            else:
+                continue
+            for item in sorted(cover, key=lambda item: values[item]):
+                if total - weights[item] > capacity + 1e-9:
+                    cover.remove(item)
+                    total -= weights[item]
+
+            heaviest = max(weights[item] for item in cover)
+            extended = set(cover) | {item for item in range(len(literals)) if weights[item] >= heaviest}
+            if sum(values[item] for item in extended) <= len(cover) - 1 + 1e-6:
+                continue
+            cuts.append(literals_cut([literals[item] for item in extended], len(cover) - 1))
+        return cuts
+
+    def __conflict_graph(self, knapsacks: list[tuple[list[Literal], list[float], float]]) -> dict[Literal, set[Literal]]:
+        # two literals conflict if their weights alone exceed the capacity of a row
+        conflicts: dict[Literal, set[Literal]] = {}
+        for literals, weights, capacity in knapsacks:
+            if len(literals) > self.max_clique_row_size:
+                continue
+            order = sorted(range(len(literals)), key=lambda item: -weights[item])
+            for position, first in enumerate(order):
+                for second in order[position + 1:]:
+                    if weights[first] + weights[second] <= capacity + 1e-9:
+                        break
+                    conflicts.setdefault(literals[first], set()).add(literals[second])
+                    conflicts.setdefault(literals[second], set()).add(literals[first])
+        return conflicts
+
+    def clique_cuts(self, conflicts: dict[Literal, set[Literal]], x: np.ndarray) -> list[LinearCut]:
+        # a clique grows greedily from every fractional literal, first over the
+        # literals with larger values, and is kept if its sum exceeds one
+        cuts = []
+        found: set[frozenset[Literal]] = set()
+        values = {literal: literal_value(literal, x) for literal in conflicts}
+        seeds = sorted((literal for literal, value in values.items() if 1e-6 < value < 1 - 1e-6),
+                       key=lambda literal: -values[literal])
+        for seed in seeds:
+            clique = [seed]
+            for literal in sorted(conflicts[seed], key=lambda literal: (-values[literal], literal)):
+                if all(literal in conflicts[member] for member in clique[1:]):
+                    clique.append(literal)
+            key = frozenset(clique)
+            if key in found or sum(values[literal] for literal in clique) <= 1 + 1e-6:
+                continue
+            found.add(key)
+            cuts.append(literals_cut(clique, 1))
+        return cuts
+
+    def __filter(self, candidates: list[tuple[str, LinearCut]], x: np.ndarray) -> list[tuple[str, LinearCut]]:
+        scored = []
+        for family, cut in candidates:
+            values = np.asarray(cut.values, dtype=np.float64)
+            norm = sqrt(float(np.dot(values, values)))
+            if norm == 0:
+                continue
+            activity = float(np.dot(values, x[np.asarray(cut.indices, dtype=np.int64)]))
+            efficacy = max(cut.lower - activity, activity - cut.upper) / norm
+            if efficacy >= self.min_efficacy:
+                scored.append((efficacy, family, cut, dict(zip(np.asarray(cut.indices).tolist(),
+                                                                (values / norm).tolist()))))
+        scored.sort(key=lambda item: -item[0])
+
+        selected = []
+        directions: list[dict[int, float]] = []
+        for _, family, cut, direction in scored:
+            if len(selected) >= self.max_cuts_per_round:
+                break
+            if any(abs(sum(value * other.get(index, 0.0) for index, value in direction.items()))
+                   >= self.max_parallelism for other in directions):
+                continue
+            selected.append((family, cut))
+            directions.append(direction)
+        return selected
+
+    def to_dict(self) -> dict:
+        return {
+            "rounds": self.number_of_rounds,
+            "cuts": dict(self.number_of_cuts),
+            "start_objective": self.start_objective,
+            "end_objective": self.end_objective,
+        }
+
+    def __repr__(self, tabs: int = 0):
+        return "\t" * tabs + f"RootSeparator {{rounds: {self.number_of_rounds}, " + \
+            ", ".join(f"{family}: {value}" for family, value in self.number_of_cuts.items()) + \
+            f", objective: {self.start_objective} -> {self.end_objective}" + "}"
+
+
+def literal_value(literal: Literal, x: np.ndarray) -> float:
+    index, is_complemented = literal
+    return 1 - x[index] if is_complemented else x[index]
+
+
+def literals_cut(literals: list[Literal], rhs: int) -> LinearCut:
+    # sum z <= rhs with z = 1 - x for the complemented literals
+    indices = [index for index, _ in literals]
+    values = [-1.0 if is_complemented else 1.0 for _, is_complemented in literals]
+    number_of_complemented = sum(1 for _, is_complemented in literals if is_complemented)
+    return LinearCut(indices, values, float("-inf"), float(rhs - number_of_complemented))
@@ -1,8 +1,30 @@
+import os
+import signal
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import count
 from math import isinf
+from time import perf_counter
+from adaptive import AdaptiveController
 from bound import Bound
+from certificate import InfeasibilityCertificate
+from checkpoint import load_checkpoint, save_checkpoint
 from extended_highs_model import ExtendedHighsModel, SolveRes
+from helpers.graph_cut import GraphCut
+from helpers.linear_cut import LinearCut
+from helpers.var import Var
+from limits import Limits, WorkCounter
+from lp_cache import LPCache
 from mip_state import MipState, State
-from node import Branchability, Node, sort_nodes
+from node import Branchability, BranchSelection, Node, sort_nodes
+from graph_recorder import GraphRecorder
+from profiler import Profiler, measure
+from progress import ProgressReporter
+from restart import RestartPolicy
+from separation import RootSeparator
+from symmetry import SymmetryDetector, symmetry_breaking_pairs
+from tree_trace import TraceWriter
 
 
 class Solver:
@@ -16,33 +38,194 @@ class Solver:
                  use_dropped: bool,
                  fuip_size: int = 1,
                  convergence_tolerance: float = 1e-4,
-                 primal_tolerance: float = 1e-9) -> None:
-
+                 primal_tolerance: float = 1e-9,
+                 time_limit: float | None = None,
+                 node_limit: int | None = None,
+                 gap_limit: float | None = None,
+                 memory_limit: float | None = None,
+                 checkpoint_path: str | None = None,
+                 checkpoint_interval: float | None = None,
+                 resume: bool = False,
+                 snapshot_dir: str | None = None,
+                 profile: bool = False,
+                 log_interval: float = 1.0,
+                 trace_path: str | None = None,
+                 graph_record_path: str | None = None,
+                 graph_sample_rate: int = 1,
+                 symmetry: bool = False,
+                 dual_ray: bool = False,
+                 certificate_path: str | None = None,
+                 restart: str = "disable",
+                 restart_trigger: str = "conflicts",
+                 restart_base: int = 100,
+                 restart_factor: float = 2.0,
+                 backend: str = "python",
+                 lp_cache_memory: float = 0.0,
+                 pipeline: int = 0,
+                 deterministic: bool = True,
+                 work_limit: int | None = None,
+                 root_cuts: bool = False,
+                 adaptive: bool = False) -> None:
+
+        if checkpoint_interval is not None and checkpoint_path is None:
+            raise ValueError("The checkpoint interval needs a checkpoint path")
+        self.__limits = Limits(time_limit, node_limit,
+                               gap_limit, memory_limit, work_limit)
+        self.__work = WorkCounter()
+        self.__profiler = Profiler() if profile else None
         self.__with_presolve = with_presolve
         self.__cutting_check = cutting_check
         self.__cutting_mod = cutting_mod
         self.__trivial_graph_cut = trivial_graph_cut
         self.__use_dropped = use_dropped
-        self.__silent = silent
-
-        self.__root_node = Node(ExtendedHighsModel(
+        self.__progress = None if silent else ProgressReporter(log_interval)
+        self.__trace = None if trace_path is None else TraceWriter(trace_path)
+        self.__node_ids = count()
+        self.__graph_recorder = None if graph_record_path is None else \
+            GraphRecorder(graph_record_path, graph_sample_rate)
+        self.__checkpoint_path = checkpoint_path
+        self.__checkpoint_interval = checkpoint_interval
+        self.__interrupted = False
+        self.__cuts: list[GraphCut | LinearCut] = []
+        self.__pending_cuts: list[GraphCut | LinearCut] = []
+        self.__dual_ray = dual_ray
+        self.__certificate_path = certificate_path
+        self.__certificate = None if certificate_path is None else InfeasibilityCertificate()
+        self.__lp_cache = None if lp_cache_memory <= 0 else LPCache(lp_cache_memory)
+        self.__pipeline = None if pipeline <= 0 else ThreadPoolExecutor(pipeline)
+        self.__pipeline_depth = pipeline
+        self.__deterministic = deterministic
+        self.__adaptive = AdaptiveController(fuip_size, self.__work) if adaptive else None
+        self.__restart_policy = None if restart == "disable" else \
+            RestartPolicy(restart, restart_trigger,
+                          restart_base, restart_factor)
+
+        self.__root_node = self.__new_node(ExtendedHighsModel(
             with_presolve,
             cutting_mod,
             fuip_size,
             path_to_problem,
-            primal_tolerance))
+            primal_tolerance,
+            snapshot_dir,
+            backend,
+            self.__lp_cache,
+            self.__work,
+            self.__adaptive,
+            self.__profiler))
+
+        number_of_symmetry_rows = 0
+        if symmetry:
+            number_of_symmetry_rows = self.__add_symmetry_breaking_rows()
+        # restarts rebuild the root from this model, which has no cuts yet
+        self.__origin_exh = self.__root_node.exh.copy()
         self.__root_node.exh.solve()
 
+        is_resumed = resume and checkpoint_path is not None and os.path.exists(checkpoint_path)
+        # the cuts of the root go to the pool as global cuts, so restarts keep them,
+        # a resumed solve gets them back from the checkpoint
+        self.__separator = None
+        if root_cuts and not is_resumed:
+            self.__separator = RootSeparator()
+            with measure(self.__profiler, "root_separation"):
+                self.__cuts.extend(self.__separator.separate(self.__root_node.exh))
+
         self.__mip_state = MipState(convergence_tolerance)
+        self.__mip_state.profiler = self.__profiler
+        self.__mip_state.lp_cache = self.__lp_cache
+        self.__mip_state.work = self.__work
+        self.__mip_state.number_of_symmetry_rows = number_of_symmetry_rows
+        self.__mip_state.separator = self.__separator
+        self.__mip_state.adaptive = self.__adaptive
+        self.__mip_state.certificate = self.__certificate
+        self.__mip_state.restart_policy = self.__restart_policy
+        if self.__separator is not None:
+            self.__mip_state.number_of_root_cuts = len(self.__cuts)
         self.__mip_state.update_solution(self.__root_node.exh.solution)
         self.__stack: list[Node] = [self.__root_node]
 
+        if is_resumed:
+            self.__resume()
+        else:
+            self.__analyze(self.__root_node)
+            self.__close_leaf(self.__root_node)
+
+        if self.__graph_recorder is not None:
+            self.__graph_recorder.record(self.__root_node.exh.graph,
+                                         self.__root_node.exh.solution.is_infeasible())
+
+    def __resume(self) -> None:
+        nodes, self.__cuts = load_checkpoint(
+            self.__checkpoint_path, self.__mip_state, self.__root_node.exh.vars)
+
+        self.__stack = []
+        for branches, fixings in nodes:
+            exh = self.__root_node.exh.copy()
+            exh.add_rows(
+                [cut for cut in self.__cuts if is_in_scope(cut, branches)])
+            # the fixings of every depth are made before its branch, as in the search
+            for depth in range(len(branches) + 1):
+                for fixing in fixings:
+                    if fixing[0] == depth:
+                        self.__apply_fixing(exh, fixing)
+                if depth == len(branches):
+                    break
+                var_index, lower, upper = branches[depth]
+                exh.change_var_bounds(exh.vars[var_index], lower, upper)
+                if self.__with_presolve:
+                    exh.graph.new_depth(exh.vars[var_index])
+                    exh.update_vars_bounds()
+
+            node = self.__new_node(exh, branches, fixings)
+            node.exh.solve()
+            if node.exh.solution.is_feasible() and self.__mip_state.check_node(node):
+                node.branchability = Branchability.Branchable
+                self.__stack.append(node)
+
+    def __add_symmetry_breaking_rows(self) -> int:
+        exh = self.__root_node.exh
+        generators = SymmetryDetector(
+            exh.vars, exh.constraints, list(exh.getLp().col_cost_)).detect()
+        pairs = symmetry_breaking_pairs(generators)
+        exh.add_rows([LinearCut([first, other], [1.0, -1.0], 0.0, float("inf"))
+                      for first, other in pairs])
+        return len(pairs)
+
+    def __restart(self) -> None:
+        # the new root keeps the learned global cuts, so its propagation turns them
+        # into root fixings, and the whole old tree is dropped with its local cuts.
+        # The origin model has the symmetry rows already, the bounds of the old root
+        # with its propagation and its strong-branching fixings become fixings of the
+        # new one, so a resumed node replays them too
+        self.__mip_state.number_of_restarts += 1
+        self.__cuts = [cut for cut in self.__cuts if len(cut.scope) == 0]
+        self.__pending_cuts = []
+        exh = self.__origin_exh.copy()
+        fixings = [(0, var.index, root_var.lower, root_var.upper)
+                   for var, root_var in zip(exh.vars, self.__root_node.exh.vars)
+                   if (var.lower, var.upper) != (root_var.lower, root_var.upper)]
+        for fixing in fixings:
+            self.__apply_fixing(exh, fixing)
+        exh.add_rows(self.__cuts)
+        if self.__certificate is not None:
+            self.__certificate.discard()
+
+        self.__root_node = self.__new_node(exh, fixings=fixings)
+        self.__root_node.exh.solve()
         self.__analyze(self.__root_node)
+        self.__close_leaf(self.__root_node)
+        self.__stack = [self.__root_node] if self.__root_node.branchability == Branchability.Branchable else []
+        if self.__trace is not None:
+            self.__trace.write("restart", node=self.__root_node.id,
+                               cuts=len(self.__cuts))
+
+    def __new_node(self, exh: ExtendedHighsModel, branches: list[tuple[int, float, float]] | None = None,
+                   fixings: list[tuple[int, int, float, float]] | None = None) -> Node:
+        node = Node(exh, branches, fixings)
+        node.id = next(self.__node_ids)
+        return node
 
-        # -----------------------
-        self.graphes = [(self.__root_node.exh.graph,
-                         self.__root_node.exh.solution.is_infeasible())]
-        # -----------------------
+    def __on_sigterm(self, signum, frame) -> None:
+        self.__interrupted = True
 
     def __analyze(self, node: Node) -> None:
         if node.branchability != Branchability.Unknown:
@@ -53,7 +236,11 @@ class Solver:
             self.__update_by_infeasible_node(node)
         elif node.exh.solution.is_feasible() and node.exh.solution.is_primal:
             branchability = Branchability.IntFeasible
+            primal_objective = self.__mip_state.primal_solution.objective
             self.__mip_state.update_solution(node.exh.solution)
+            if self.__trace is not None and self.__mip_state.primal_solution.objective != primal_objective:
+                self.__trace.write("incumbent", node=node.id,
+                                   objective=node.exh.solution.objective)
         elif node.exh.solution.is_feasible() and self.__mip_state.check_node(node):
             branchability = Branchability.Branchable
         else:
@@ -64,83 +251,235 @@ class Solver:
         self.__mip_state.branchability_statistic.add(branchability)
         node.branchability = branchability
 
+        if self.__trace is not None and branchability in (Branchability.Infeasible, Branchability.Dropped):
+            self.__trace.write("prune", node=node.id, reason=branchability.name,
+                               depth=len(node.branches), objective=node.exh.solution.objective)
+
     def __branch(self, node: Node) -> tuple[Node, Node]:
         self.__mip_state.number_of_branches += 1
 
-        max_diff = 0
-        nodes: tuple[Node, Node] = ()
+        # with a pipeline the LPs of the next candidates run in the pool while the
+        # children of the earlier ones are analysed, in the candidate order when
+        # the run has to be reproducible and in the order of completion otherwise
+        selection = BranchSelection(node)
+        pending: deque[tuple[Var, Node, Node, list[Future | None]]] = deque()
+        stop = False
         for var, val in zip(node.exh.solution.value[0], node.exh.solution.value[1]):
             if not var.is_general or var.is_conv() or min(val % 1, 1 - val % 1) < node.exh.solution.primal_tolerance:
                 continue
 
-            if abs(val - var.lower) <= node.exh.solution.primal_tolerance and not isinf(var.lower) and not isinf(var.upper):
-                bound = (var.lower + var.upper) // 2
-                left_bound = Bound(lower=var.lower + 1, upper=bound)
-                right_bound = Bound(lower=bound + 1, upper=var.upper)
-            elif abs(val - var.upper) <= node.exh.solution.primal_tolerance and not isinf(var.lower) and not isinf(var.upper):
-                bound = (var.lower + var.upper) // 2 - 1
-                left_bound = Bound(lower=var.lower, upper=bound)
-                right_bound = Bound(lower=bound + 1, upper=var.upper - 1)
+            left_node, right_node = self.__candidate_children(node, var, val)
+            if self.__pipeline is None:
+                for child_node in (left_node, right_node):
+                    child_node.exh.solve(var)
+                stop = self.__evaluate_candidate(
+                    node, var, left_node, right_node, selection)
             else:
-                if var.upper - var.lower > 10 and not isinf(var.lower) and not isinf(var.upper):
-                    bound = (var.lower + var.upper) // 2
-                else:
-                    bound = int(val)
-                left_bound = Bound(lower=var.lower, upper=bound)
-                right_bound = Bound(lower=bound + 1, upper=var.upper)
-
-            left_exh = node.exh.copy()
-            right_exh = node.exh.copy()
-
-            left_exh.change_var_bounds(
-                var, left_bound.lower, left_bound.upper)
-            right_exh.change_var_bounds(
-                var, right_bound.lower, right_bound.upper)
-
-            left_node = Node(left_exh)
-            left_node.exh.solve(var)
-
-            right_node = Node(right_exh)
-            right_node.exh.solve(var)
-
-            self.__analyze(left_node)
-            self.__analyze(right_node)
-
-            if left_node.branchability == Branchability.Branchable or len(nodes) == 0:
-                diff = left_node.exh.solution.objective - node.exh.solution.objective
-                if diff >= max_diff:
-                    max_diff = diff
-                    nodes = (left_node, right_node)
-
-            if right_node.branchability == Branchability.Branchable or len(nodes) == 0:
-                diff = right_node.exh.solution.objective - node.exh.solution.objective
-                if diff >= max_diff:
-                    max_diff = diff
-                    nodes = (left_node, right_node)
-
-            self.__mip_state.number_of_relaxations += 2
-
-        # ---------------------------------------------------------------------------------
-        self.graphes.append(
-            (nodes[0].exh.graph, nodes[0].exh.solution.is_infeasible()))
-        self.graphes.append(
-            (nodes[1].exh.graph, nodes[1].exh.solution.is_infeasible()))
-        # ---------------------------------------------------------------------------------
+                futures = [self.__pipeline.submit(child_node.exh.run) if child_node.exh.prepare(var) else None
+                           for child_node in (left_node, right_node)]
+                pending.append((var, left_node, right_node, futures))
+                stop = len(pending) > self.__pipeline_depth and \
+                    self.__finish_candidate(node, self.__next_candidate(pending), selection)
+
+            # a SIGTERM has to be answered with a checkpoint before the grace period ends,
+            # the time would make the chosen candidate depend on the speed of the run
+            if stop or self.__interrupted or self.__limits.is_work_exceeded(self.__work.lp_iterations) or \
+                    (not self.__deterministic and self.__limits.is_time_exceeded()):
+                break
+
+        while len(pending) > 0 and not stop:
+            stop = self.__finish_candidate(
+                node, self.__next_candidate(pending), selection)
+        # the parent is closed, the remaining LPs are running already, they are only
+        # awaited and never analysed, so no child of a closed parent is selected
+        for _, left_node, right_node, futures in pending:
+            for child_node, future in zip((left_node, right_node), futures):
+                if future is not None:
+                    future.result()
+                child_node.exh.finish()
+
+        nodes = selection.nodes
+        if self.__certificate is not None:
+            self.__certificate.discard()
+        if self.__graph_recorder is not None:
+            for child_node in nodes:
+                self.__graph_recorder.record(child_node.exh.graph,
+                                             child_node.exh.solution.is_infeasible())
 
         return sort_nodes(nodes[0], nodes[1])
 
+    def __next_candidate(self, pending: deque[tuple[Var, Node, Node, list[Future | None]]]) -> tuple[Var, Node, Node, list[Future | None]]:
+        if self.__deterministic:
+            return pending.popleft()
+        while True:
+            for candidate in pending:
+                if all(future is None or future.done() for future in candidate[3]):
+                    pending.remove(candidate)
+                    return candidate
+            wait([future for candidate in pending for future in candidate[3] if future is not None],
+                 return_when=FIRST_COMPLETED)
+
+    def __candidate_children(self, node: Node, var: Var, val: float) -> tuple[Node, Node]:
+        if abs(val - var.lower) <= node.exh.solution.primal_tolerance and not isinf(var.lower) and not isinf(var.upper):
+            bound = (var.lower + var.upper) // 2
+            left_bound = Bound(lower=var.lower + 1, upper=bound)
+            right_bound = Bound(lower=bound + 1, upper=var.upper)
+        elif abs(val - var.upper) <= node.exh.solution.primal_tolerance and not isinf(var.lower) and not isinf(var.upper):
+            bound = (var.lower + var.upper) // 2 - 1
+            left_bound = Bound(lower=var.lower, upper=bound)
+            right_bound = Bound(lower=bound + 1, upper=var.upper - 1)
+        else:
+            if var.upper - var.lower > 10 and not isinf(var.lower) and not isinf(var.upper):
+                bound = (var.lower + var.upper) // 2
+            else:
+                bound = int(val)
+            left_bound = Bound(lower=var.lower, upper=bound)
+            right_bound = Bound(lower=bound + 1, upper=var.upper)
+
+        left_exh = node.exh.copy()
+        right_exh = node.exh.copy()
+
+        left_exh.change_var_bounds(
+            var, left_bound.lower, left_bound.upper)
+        right_exh.change_var_bounds(
+            var, right_bound.lower, right_bound.upper)
+
+        # the children have the fixings of the parent made so far, the later ones
+        # are not in their copies of the model
+        left_node = self.__new_node(left_exh, node.branches +
+                                    [(var.index, left_bound.lower, left_bound.upper)], node.fixings.copy())
+        right_node = self.__new_node(right_exh, node.branches +
+                                     [(var.index, right_bound.lower, right_bound.upper)], node.fixings.copy())
+        return left_node, right_node
+
+    def __finish_candidate(self, node: Node, candidate: tuple[Var, Node, Node, list[Future | None]],
+                           selection: BranchSelection) -> bool:
+        var, left_node, right_node, futures = candidate
+        for child_node, future in zip((left_node, right_node), futures):
+            if future is not None:
+                future.result()
+            child_node.exh.finish()
+        return self.__evaluate_candidate(node, var, left_node, right_node, selection)
+
+    def __evaluate_candidate(self, node: Node, var: Var, left_node: Node, right_node: Node,
+                             selection: BranchSelection) -> bool:
+        number_of_cuts = len(self.__cuts)
+        self.__analyze(left_node)
+        self.__analyze(right_node)
+        # the cuts of the children hold in the parent too, so the next candidates get them
+        node.exh.add_rows([cut for cut in self.__cuts[number_of_cuts:]
+                           if is_in_scope(cut, node.branches)])
+
+        self.__mip_state.number_of_relaxations += 2
+        left_is_pruned = self.__is_pruned(left_node)
+        right_is_pruned = self.__is_pruned(right_node)
+        if left_is_pruned and right_is_pruned:
+            # no child can improve, so the parent is done
+            selection.nodes = (left_node, right_node)
+            self.__close_leaf(left_node)
+            self.__close_leaf(right_node)
+            return True
+        if left_is_pruned or right_is_pruned:
+            self.__fix_by_pruned_child(
+                node, var, left_node if left_is_pruned else right_node,
+                Bound(*right_node.branches[-1][1:]) if left_is_pruned else Bound(*left_node.branches[-1][1:]))
+
+        selection.add(left_node, right_node)
+        return False
+
+    def __is_pruned(self, node: Node) -> bool:
+        # a dropped child proves nothing about its side if its LP stopped on a limit
+        # or was not solved, only an optimal bound above the incumbent prunes it
+        return node.branchability == Branchability.Infeasible or \
+            (node.branchability == Branchability.Dropped and node.exh.solution.is_feasible() and
+             not self.__mip_state.check_node(node))
+
+    def __fix_by_pruned_child(self, node: Node, var: Var, pruned_node: Node, bound: Bound) -> None:
+        # one side of the candidate is pruned, so the parent keeps the other side,
+        # the fixing is recorded with the depth it is made at, so a resumed or
+        # rebuilt node gets it back between the same branches
+        self.__mip_state.number_of_strong_branching_fixings += 1
+        fixing = (len(node.branches), var.index, bound.lower, bound.upper)
+        node.fixings.append(fixing)
+        self.__apply_fixing(node.exh, fixing)
+        if self.__certificate is not None and pruned_node.branchability == Branchability.Infeasible:
+            self.__certificate.close_by_fixing(
+                pruned_node.id, node.branches, var.index, bound.lower, bound.upper)
+        if self.__trace is not None:
+            self.__trace.write("fixing", node=node.id, var=var.index,
+                               lower=bound.lower, upper=bound.upper)
+
+    def __apply_fixing(self, exh: ExtendedHighsModel, fixing: tuple[int, int, float, float]) -> None:
+        _, var_index, lower, upper = fixing
+        exh.change_var_bounds(exh.vars[var_index], lower, upper)
+        if self.__with_presolve:
+            exh.graph.add_fixing(exh.vars[var_index])
+
+    def __close_leaf(self, node: Node) -> None:
+        if self.__certificate is not None and node.branchability == Branchability.Infeasible:
+            self.__certificate.close_leaf(node.id)
+
     def __update_by_infeasible_node(self, node: Node) -> None:
-        # print(len(node.exh.getDualRay()[2]), len(node.exh.constraints))
-        if self.__with_presolve and self.__cutting_mod > 0:
-            graph_cut = node.exh.graph.get_graph_cut()
+        if node.exh.solution.is_infeasible() and (self.__dual_ray or self.__certificate is not None):
+            self.__update_by_dual_ray(node)
+
+        if self.__with_presolve and self.__cutting_mod > 0 and \
+                (self.__adaptive is None or self.__adaptive.cutting):
+            number_of_cuts = self.__mip_state.number_of_cuts
+            if self.__adaptive is not None:
+                node.exh.graph.fuip_size = self.__adaptive.fuip_size
+            with measure(self.__profiler, "fuip"):
+                graph_cut, scope = node.exh.graph.get_graph_cut(
+                    self.__root_node.exh.vars, check=self.__cutting_check)
             if not graph_cut.is_empty() and (not graph_cut.is_trivial or self.__trivial_graph_cut):
                 if not graph_cut.is_trivial:
                     self.__mip_state.number_of_non_trivial_graph_cuts += 1
-                if self.__cutting_check:
+                # the cut relies on the local cuts of the node as well
+                graph_cut.scope = node.branches[:max(
+                    scope, node.exh.cut_scope())]
+                # only a global cut can be checked on the root
+                check = self.__cutting_check and len(graph_cut.scope) == 0
+                if check:
                     self.__mip_state.number_of_resolved_nodes += 1
-                if not self.__cutting_check or self.__root_node.exh.validate_cut(graph_cut):
-                    for stack_node in self.__stack:
-                        stack_node.exh.add_row(graph_cut)
+                if not check or self.__root_node.exh.validate_cut(graph_cut):
+                    self.__add_cut(graph_cut, node, trivial=graph_cut.is_trivial)
+            if self.__adaptive is not None:
+                # the analysis visits every node and edge of the graph once
+                self.__adaptive.on_conflict(len(node.exh.graph.nodes) + len(node.exh.graph.edges),
+                                            self.__mip_state.number_of_cuts - number_of_cuts)
+
+    def __update_by_dual_ray(self, node: Node) -> None:
+        dual_ray_cut, multipliers = node.exh.dual_ray_cut(
+            self.__root_node.exh.vars) or (None, None)
+        if self.__certificate is not None:
+            self.__certificate.add_leaf(node.id, node.branches, node.fixings.copy(), dual_ray_cut, multipliers,
+                                        node.exh.number_of_problem_rows)
+        if not self.__dual_ray or dual_ray_cut is None:
+            return
+
+        self.__mip_state.number_of_dual_ray_cuts += 1
+        # the origin bounds of a local cut hold only in its subtree
+        dual_ray_cut.scope = node.branches[:max(
+            (node.exh.constraints[constr_idx].scope for constr_idx in multipliers), default=0)]
+        self.__add_cut(dual_ray_cut, node, dual_ray=True)
+
+    def __add_cut(self, cut: GraphCut | LinearCut, node: Node, **fields) -> None:
+        self.__cuts.append(cut)
+        self.__mip_state.number_of_cuts += 1
+        if len(cut.scope) > 0:
+            self.__mip_state.number_of_local_cuts += 1
+        if self.__trace is not None:
+            self.__trace.write("cut", node=node.id, size=len(cut.indices),
+                               scope=len(cut.scope), **fields)
+        self.__pending_cuts.append(cut)
+
+    def __flush_cuts(self) -> None:
+        # the open nodes are not solved during a step, so they get the cuts of the
+        # step in one batch at its end
+        for stack_node in self.__stack:
+            stack_node.exh.add_rows([cut for cut in self.__pending_cuts
+                                     if is_in_scope(cut, stack_node.branches)])
+        self.__pending_cuts = []
 
     def __step(self, node: Node) -> None:
         res_solve = node.exh.solve()
@@ -151,22 +490,47 @@ class Solver:
                 self.__mip_state.number_of_objective_changes += 1
 
         self.__analyze(node)
+        self.__close_leaf(node)
 
         if node.branchability != Branchability.Branchable:
             return
 
-        for child_node in self.__branch(node):
+        with measure(self.__profiler, "strong_branching"):
+            child_nodes = self.__branch(node)
+        self.__flush_cuts()
+        if self.__trace is not None:
+            self.__trace.write("branch", node=node.id, var=child_nodes[0].branches[-1][0],
+                               children=[child_node.id for child_node in child_nodes])
+
+        for child_node in child_nodes:
             self.__analyze(child_node)
             if child_node.branchability == Branchability.Branchable:
                 self.__stack.append(child_node)
 
     def solve(self):
+        handle_sigterm = self.__checkpoint_path is not None and \
+            threading.current_thread() is threading.main_thread()
+        if handle_sigterm:
+            previous_handler = signal.signal(
+                signal.SIGTERM, self.__on_sigterm)
+        last_checkpoint_time = perf_counter()
+
         while self.__stack:
+            if self.__interrupted:
+                self.__mip_state.set_limit_reached("interrupt")
+                break
 
-            node = self.__stack.pop()
+            reached_limit = self.__limits.check(
+                self.__mip_state.number_of_nodes, self.__mip_state.gap(), self.__work.lp_iterations)
+            if reached_limit is not None:
+                self.__mip_state.set_limit_reached(reached_limit)
+                break
 
-            if not self.__silent:
-                self.printing_info(node)
+            self.__flush_cuts()
+            node = self.__stack.pop()
+            self.__mip_state.number_of_nodes += 1
+            if self.__adaptive is not None:
+                self.__adaptive.on_node()
 
             self.__step(node)
 
@@ -174,21 +538,52 @@ class Solver:
                 self.__mip_state.update_solution(
                     min(self.__stack, key=lambda x: x.exh.solution.objective).exh.solution)
 
+            if self.__restart_policy is not None and self.__stack and \
+                    self.__restart_policy.should_restart(self.__mip_state.number_of_nodes, self.__mip_state.number_of_cuts):
+                self.__restart()
+
+            if self.__progress is not None:
+                self.__progress.report(self.__mip_state, len(self.__stack))
+
             if self.__mip_state.state == State.Converged:
                 break
 
+            if self.__checkpoint_interval is not None and \
+                    perf_counter() - last_checkpoint_time >= self.__checkpoint_interval:
+                self.__cuts = self.__live_cuts()
+                self.save_checkpoint()
+                last_checkpoint_time = perf_counter()
+
+        if self.__checkpoint_path is not None:
+            self.save_checkpoint()
+        if handle_sigterm:
+            signal.signal(signal.SIGTERM, previous_handler)
+        if self.__trace is not None:
+            self.__trace.close()
+        if self.__graph_recorder is not None:
+            self.__graph_recorder.close()
+        if self.__pipeline is not None:
+            self.__pipeline.shutdown()
+
         self.__mip_state.on_end()
+        if self.__certificate is not None and self.__mip_state.state == State.Infeasible:
+            self.__certificate.write(self.__certificate_path, self.__origin_exh.vars,
+                                     self.__origin_exh.constraints[:self.__origin_exh.number_of_problem_rows])
+        if self.__progress is not None:
+            self.__progress.report(self.__mip_state, len(self.__stack), force=True)
 
-        # --------------------------
-        return self.graphes
-        # --------------------------
+    def save_checkpoint(self) -> None:
+        save_checkpoint(self.__checkpoint_path, self.__stack,
+                        self.__live_cuts(), self.__mip_state)
 
-    def printing_info(self, node: Node) -> None:
-        print(f"number of branches: {self.__mip_state.number_of_branches}\t" +
-              f"depth: {node.exh.graph.depth}\t" +
-              f"primal value: {self.__mip_state.primal_solution.objective}\t" +
-              f"dual value: {self.__mip_state.dual_solution.objective}\t"
-              )
+    def __live_cuts(self) -> list[GraphCut | LinearCut]:
+        # the local cuts of finished subtrees are not needed any more
+        return [cut for cut in self.__cuts
+                if len(cut.scope) == 0 or any(is_in_scope(cut, node.branches) for node in self.__stack)]
 
     def result(self) -> MipState:
         return self.__mip_state
+
+
+def is_in_scope(cut: GraphCut | LinearCut, branches: list[tuple[int, float, float]]) -> bool:
+    return branches[:len(cut.scope)] == cut.scope
@@ -0,0 +1,118 @@
+from numpy_backend import BACKENDS
+
+
+CUTTING_MODS = {"disable": 0, "fuip": 1, "roots": 2, "leafs": 3}
+
+
+def add_solver_arguments(parser) -> None:
+    parser.add_argument("--presolve", type=str, default="enable", choices=["enable", "disable"],
+                        help="Enable or disable presolving in the custom solver. (default = `enable`)")
+    parser.add_argument("--cutting", type=str, default="fuip", choices=["roots", "leafs", "fuip", "disable"],
+                        help="Cutting behaviour in the custom solver. (default = `fuip`)")
+    parser.add_argument("--cutting-check", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable the check that a graph cut separates the conflict and the LP check of global cuts in the custom solver. (default = `disable`)")
+    parser.add_argument("--trivial-graph-cut", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable trivial graph cuts in the custom solver. (default = `disable`)")
+    parser.add_argument("--silent", type=str, default="enable", choices=["enable", "disable"],
+                        help="Enable or disable writing info from the custom solver. (default = `enable`)")
+    parser.add_argument("--fuip-size", type=int, default=1,
+                        help="Size of FUIP group in the custom solver. (default = `1`)")
+    parser.add_argument("--use-dropped", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable using the dropped nodes like infeasible in the custom solver. (default = `disable`)")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="Time limit in seconds for the custom solver. (default = `None`)")
+    parser.add_argument("--node-limit", type=int, default=None,
+                        help="Limit on the number of processed nodes in the custom solver. (default = `None`)")
+    parser.add_argument("--gap-limit", type=float, default=None,
+                        help="Relative gap at which the custom solver stops. (default = `None`)")
+    parser.add_argument("--memory-limit", type=float, default=None,
+                        help="Peak memory limit in megabytes for the custom solver. (default = `None`)")
+    parser.add_argument("--work-limit", type=int, default=None,
+                        help="Limit on the number of LP iterations, a reproducible replacement of the time limit. (default = `None`)")
+    parser.add_argument("--checkpoint", type=str, default=None,
+                        help="Path to the checkpoint file of the custom solver. (default = `None`)")
+    parser.add_argument("--checkpoint-interval", type=float, default=None,
+                        help="Interval in seconds between checkpoints of the custom solver. (default = `None`)")
+    parser.add_argument("--resume", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable resuming the custom solver from the checkpoint. (default = `disable`)")
+    parser.add_argument("--snapshot-dir", type=str, default=None,
+                        help="Directory of the cached binary model snapshots. (default = `None`)")
+
+    parser.add_argument("--profile", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable timing of the solver phases. (default = `disable`)")
+
+    parser.add_argument("--log-interval", type=float, default=1.0,
+                        help="Interval in seconds between progress lines of the custom solver. (default = `1.0`)")
+    parser.add_argument("--trace", type=str, default=None,
+                        help="Path to the NDJSON trace of the search tree events. (default = `None`)")
+
+    parser.add_argument("--graph-record", type=str, default=None,
+                        help="Path to the NDJSON file with the recorded implication graphs. (default = `None`)")
+    parser.add_argument("--graph-sample-rate", type=int, default=1,
+                        help="Record every n-th implication graph. (default = `1`)")
+
+    parser.add_argument("--symmetry", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable symmetry breaking rows in the custom solver. (default = `disable`)")
+
+    parser.add_argument("--dual-ray", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable conflict rows from the dual rays of infeasible nodes. (default = `disable`)")
+    parser.add_argument("--certificate", type=str, default=None,
+                        help="Path to the infeasibility certificate written when the problem is infeasible. (default = `None`)")
+
+    parser.add_argument("--restart", type=str, default="disable", choices=["luby", "geometric", "disable"],
+                        help="Restart policy of the custom solver. (default = `disable`)")
+    parser.add_argument("--restart-trigger", type=str, default="conflicts", choices=["nodes", "conflicts"],
+                        help="Counter that triggers the restarts. (default = `conflicts`)")
+    parser.add_argument("--restart-base", type=int, default=100,
+                        help="Base number of nodes or conflicts between restarts. (default = `100`)")
+    parser.add_argument("--restart-factor", type=float, default=2.0,
+                        help="Growth factor of the geometric restart policy. (default = `2.0`)")
+    parser.add_argument("--backend", type=str, default="python", choices=BACKENDS,
+                        help="Backend of the propagation and primal check, `check` compares numpy with python. (default = `python`)")
+    parser.add_argument("--lp-cache", type=float, default=0.0,
+                        help="Memory in MB of the cache of LP results, `0` disables it. (default = `0`)")
+    parser.add_argument("--pipeline", type=int, default=0,
+                        help="Number of threads solving the LPs of strong branching candidates ahead, `0` solves them in turn. (default = `0`)")
+    parser.add_argument("--deterministic", type=str, default="enable", choices=["enable", "disable"],
+                        help="Enable or disable the reproducible order of the pipelined LPs. (default = `enable`)")
+    parser.add_argument("--root-cuts", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable the rounds of Gomory, cover and clique cuts at the root. (default = `disable`)")
+    parser.add_argument("--adaptive", type=str, default="disable", choices=["enable", "disable"],
+                        help="Enable or disable tuning the propagation passes, the cutting and the FUIP size by their measured effect. (default = `disable`)")
+
+
+def solver_kwargs(args) -> dict:
+    return dict(with_presolve=args.presolve == "enable",
+                cutting_check=args.cutting_check == "enable",
+                cutting_mod=CUTTING_MODS[args.cutting],
+                trivial_graph_cut=args.trivial_graph_cut == "enable",
+                use_dropped=args.use_dropped == "enable",
+                silent=args.silent == "enable",
+                fuip_size=args.fuip_size,
+                time_limit=args.time_limit,
+                node_limit=args.node_limit,
+                gap_limit=args.gap_limit,
+                memory_limit=args.memory_limit,
+                checkpoint_path=args.checkpoint,
+                checkpoint_interval=args.checkpoint_interval,
+                resume=args.resume == "enable",
+                snapshot_dir=args.snapshot_dir,
+                profile=args.profile == "enable",
+                log_interval=args.log_interval,
+                trace_path=args.trace,
+                graph_record_path=args.graph_record,
+                graph_sample_rate=args.graph_sample_rate,
+                symmetry=args.symmetry == "enable",
+                dual_ray=args.dual_ray == "enable",
+                certificate_path=args.certificate,
+                restart=args.restart,
+                restart_trigger=args.restart_trigger,
+                restart_base=args.restart_base,
+                restart_factor=args.restart_factor,
+                backend=args.backend,
+                lp_cache_memory=args.lp_cache,
+                pipeline=args.pipeline,
+                deterministic=args.deterministic == "enable",
+                work_limit=args.work_limit,
+                root_cuts=args.root_cuts == "enable",
+                adaptive=args.adaptive == "enable")
@@ -0,0 +1,180 @@
+import numpy as np
+
+from helpers.constraint import Constraint
+from helpers.var import Var
+
+
+class SymmetryDetector:
+    # Column symmetries are searched on the colored bipartite graph of columns and
+    # rows by individualization and refinement. Every automorphism found on the way
+    # is kept, the orbits of the found generators prune the search like in nauty.
+    def __init__(self, vars: list[Var], constraints: list[Constraint], costs: list[float],
+                 max_search_nodes: int = 10000) -> None:
+        self.number_of_cols = len(vars)
+        self.number_of_vertices = len(vars) + len(constraints)
+        self.max_search_nodes = max_search_nodes
+        self.number_of_search_nodes = 0
+
+        self.row_entries: list[dict[int, float]] = []
+        edge_rows = []
+        edge_cols = []
+        edge_coeffs = []
+        for constr in constraints:
+            entries = {}
+            for var, coeff in constr.terms():
+                edge_rows.append(self.number_of_cols + constr.index)
+                edge_cols.append(var.index)
+                edge_coeffs.append(coeff)
+                entries[var.index] = coeff
+            self.row_entries.append(entries)
+
+        # every edge is stored in both directions with the index of its coefficient value
+        coeff_ids = np.unique(edge_coeffs, return_inverse=True)[1].astype(np.uint64)
+        self.edge_source = np.array(edge_rows + edge_cols, dtype=np.int64)
+        self.edge_target = np.array(edge_cols + edge_rows, dtype=np.int64)
+        self.edge_coeff = np.concatenate([coeff_ids, coeff_ids])
+
+        initial_colors = [(0, costs[var.index], var.lower, var.upper, var.is_general) for var in vars] + \
+            [(1, constr.lower, constr.upper) for constr in constraints]
+        palette = {color: idx for idx, color in enumerate(
+            sorted(set(initial_colors)))}
+        self.initial_colors = np.array(
+            [palette[color] for color in initial_colors], dtype=np.int64)
+
+        self.path: list[tuple[np.ndarray, list[int], int]] = []
+        self.reference_leaf = self.initial_colors
+
+    def refine(self, colors: np.ndarray) -> np.ndarray:
+        # the neighbourhood of a vertex is summarized by a sum of hashed
+        # (coefficient, color) pairs; a collision can only merge cells, which makes
+        # the leaf check fail, so the found automorphisms stay exact
+        number_of_colors = len(np.unique(colors))
+        while True:
+            keys = self.edge_coeff * np.uint64(self.number_of_vertices + 1) + \
+                colors[self.edge_target].astype(np.uint64)
+            signatures = np.zeros(self.number_of_vertices, dtype=np.uint64)
+            np.add.at(signatures, self.edge_source, mix(keys))
+            pairs = np.stack([colors.astype(np.uint64), signatures], axis=1)
+            unique_pairs, new_colors = np.unique(
+                pairs, axis=0, return_inverse=True)
+            colors = new_colors.reshape(-1).astype(np.int64)
+            if len(unique_pairs) == number_of_colors:
+                return colors
+            number_of_colors = len(unique_pairs)
+
+    def individualize(self, colors: np.ndarray, vertex: int) -> np.ndarray:
+        new_colors = 2 * colors
+        new_colors[vertex] += 1
+        return self.refine(new_colors)
+
+    def target_cell(self, colors: np.ndarray) -> list[int] | None:
+        cells: dict[int, list[int]] = {}
+        for vertex, color in enumerate(colors[:self.number_of_cols].tolist()):
+            cells.setdefault(color, []).append(vertex)
+        non_singleton = [color for color,
+                         cell in cells.items() if len(cell) > 1]
+        if len(non_singleton) == 0:
+            return None
+        return cells[min(non_singleton)]
+
+    def detect(self) -> list[list[int]]:
+        colors = self.refine(self.initial_colors)
+        while (cell := self.target_cell(colors)) is not None:
+            self.path.append((colors, cell, cell[0]))
+            colors = self.individualize(colors, cell[0])
+        self.reference_leaf = colors
+
+        generators: list[list[int]] = []
+        for level in range(len(self.path) - 1, -1, -1):
+            colors, cell, vertex = self.path[level]
+            orbits = Orbits(self.number_of_cols, generators)
+            for other_vertex in cell:
+                if orbits.find(other_vertex) == orbits.find(vertex):
+                    continue
+                permutation = self.__search(
+                    self.individualize(colors, other_vertex), level + 1)
+                if permutation is not None:
+                    generators.append(permutation)
+                    orbits.add(permutation)
+                if self.number_of_search_nodes >= self.max_search_nodes:
+                    return generators
+        return generators
+
+    def __search(self, colors: np.ndarray, level: int) -> list[int] | None:
+        self.number_of_search_nodes += 1
+        if self.number_of_search_nodes >= self.max_search_nodes:
+            return None
+
+        reference = self.path[level][0] if level < len(
+            self.path) else self.reference_leaf
+        if not np.array_equal(np.bincount(colors), np.bincount(reference)):
+            return None
+
+        cell = self.target_cell(colors)
+        if cell is None:
+            return self.__leaf_automorphism(colors)
+
+        for vertex in cell:
+            permutation = self.__search(
+                self.individualize(colors, vertex), level + 1)
+            if permutation is not None:
+                return permutation
+        return None
+
+    def __leaf_automorphism(self, colors: np.ndarray) -> list[int] | None:
+        # rows of the same color are identical once every column is a singleton,
+        # so they can be paired in any order
+        mapping = np.empty(self.number_of_vertices, dtype=np.int64)
+        mapping[np.argsort(self.reference_leaf, kind="stable")] = np.argsort(
+            colors, kind="stable")
+        mapping = mapping.tolist()
+
+        for row_idx, entries in enumerate(self.row_entries):
+            mapped_row = mapping[self.number_of_cols +
+                                 row_idx] - self.number_of_cols
+            if {mapping[col]: coeff for col, coeff in entries.items()} != self.row_entries[mapped_row]:
+                return None
+
+        return mapping[:self.number_of_cols]
+
+
+class Orbits:
+    def __init__(self, size: int, permutations: list[list[int]]) -> None:
+        self.parent = list(range(size))
+        for permutation in permutations:
+            self.add(permutation)
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def add(self, permutation: list[int]) -> None:
+        for item, image in enumerate(permutation):
+            self.parent[self.find(item)] = self.find(image)
+
+
+def symmetry_breaking_pairs(generators: list[list[int]]) -> list[tuple[int, int]]:
+    # For any group element g the lexicographically maximal point of an orbit
+    # satisfies x >=lex g(x), so x_k >= x_g^-1(k) holds for the first moved column k.
+    # The same column order is used for every generator, so all pairs hold together.
+    pairs: list[tuple[int, int]] = []
+    for permutation in generators:
+        moved = [col for col, image in enumerate(permutation) if col != image]
+        if len(moved) == 0:
+            continue
+        first = moved[0]
+        inverse_image = permutation.index(first)
+        for other in (inverse_image, permutation[first]):
+            if (first, other) not in pairs:
+                pairs.append((first, other))
+    return pairs
+
+
+def mix(keys: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer
+    keys = keys + np.uint64(0x9E3779B97F4A7C15)
+    keys = (keys ^ (keys >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    keys = (keys ^ (keys >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return keys ^ (keys >> np.uint64(31))
@@ -0,0 +1,25 @@
+import argparse
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from solver import Solver  # noqa: E402
+from solver_args import add_solver_arguments, solver_kwargs  # noqa: E402
+
+
+PROBLEMS_DIR = os.path.join(ROOT, "problems")
+
+
+@pytest.fixture
+def make_solver():
+    # a solver with the defaults of the command line and the given settings
+    def make(problem: str, **kwargs) -> Solver:
+        parser = argparse.ArgumentParser()
+        add_solver_arguments(parser)
+        return Solver(path_to_problem=os.path.join(PROBLEMS_DIR, problem),
+                      **{**solver_kwargs(parser.parse_args([])), **kwargs})
+    return make
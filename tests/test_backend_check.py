@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+import extended_highs_model
+from conftest import PROBLEMS_DIR
+from numpy_backend import BackendMismatch
+
+
+@pytest.mark.parametrize("problem", sorted(os.listdir(PROBLEMS_DIR)))
+def test_backends_agree(make_solver, problem):
+    # every propagation pass and primal check compares numpy with python
+    solver = make_solver(problem, backend="check", node_limit=10)
+    solver.solve()
+
+
+def test_mismatch_is_raised(make_solver, monkeypatch):
+    monkeypatch.setattr(extended_highs_model, "candidate_bounds",
+                        lambda arrays, vars, constraints: [])
+    with pytest.raises(BackendMismatch):
+        make_solver("stein9inf.mps", backend="check").solve()
@@ -0,0 +1,29 @@
+import json
+import os
+
+from certificate import check_certificate, read_problem
+from conftest import PROBLEMS_DIR
+
+
+def write_certificate(make_solver, tmp_path, **kwargs) -> dict:
+    path = str(tmp_path / "certificate.json")
+    make_solver("stein9inf.mps", certificate_path=path, **kwargs).solve()
+    with open(path) as file:
+        return json.load(file)
+
+
+def test_certificate_is_verified(make_solver, tmp_path):
+    # without the propagation and the cuts every leaf is closed by its LP alone
+    data = write_certificate(make_solver, tmp_path, with_presolve=False, cutting_mod=0)
+    problem = read_problem(os.path.join(PROBLEMS_DIR, "stein9inf.mps"))
+    assert data["status"] == "infeasible"
+    assert check_certificate(data, *problem) == []
+
+    data["leaves"].pop()
+    assert check_certificate(data, *problem) != []
+
+
+def test_status_matches_the_check(make_solver, tmp_path):
+    data = write_certificate(make_solver, tmp_path)
+    errors = check_certificate(data, *read_problem(os.path.join(PROBLEMS_DIR, "stein9inf.mps")))
+    assert data["status"] == ("incomplete" if errors else "infeasible")
@@ -0,0 +1,15 @@
+def test_resumed_nodes_keep_the_fixings(make_solver, tmp_path):
+    path = str(tmp_path / "gt2.ckpt")
+    solver = make_solver("gt2.mps", node_limit=60, checkpoint_path=path)
+    solver.solve()
+    resumed = make_solver("gt2.mps", node_limit=60, checkpoint_path=path, resume=True)
+
+    nodes = {tuple(node.branches): node for node in solver._Solver__stack}
+    resumed_nodes = {tuple(node.branches): node for node in resumed._Solver__stack}
+    assert sum(len(node.fixings) for node in nodes.values()) > 0
+    assert nodes.keys() == resumed_nodes.keys()
+    for branches, node in nodes.items():
+        resumed_node = resumed_nodes[branches]
+        assert resumed_node.fixings == node.fixings
+        assert [(var.lower, var.upper) for var in resumed_node.exh.vars] == \
+            [(var.lower, var.upper) for var in node.exh.vars]
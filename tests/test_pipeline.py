@@ -0,0 +1,30 @@
+import pytest
+
+from node import Branchability
+from solver import Solver
+
+
+@pytest.mark.parametrize("problem,pipeline", [("stein15inf.mps", 2), ("enlight4.mps", 3)])
+@pytest.mark.parametrize("deterministic", [True, False])
+def test_closed_parent_has_no_branchable_child(make_solver, monkeypatch, problem, pipeline, deterministic):
+    evaluate_candidate = Solver._Solver__evaluate_candidate
+    branch = Solver._Solver__branch
+    closed = []
+
+    def recording_evaluate_candidate(self, *args, **kwargs):
+        stop = evaluate_candidate(self, *args, **kwargs)
+        closed[-1] |= stop
+        return stop
+
+    def checked_branch(self, node):
+        closed.append(False)
+        child_nodes = branch(self, node)
+        if closed[-1]:
+            assert all(child_node.branchability != Branchability.Branchable
+                       for child_node in child_nodes)
+        return child_nodes
+
+    monkeypatch.setattr(Solver, "_Solver__evaluate_candidate", recording_evaluate_candidate)
+    monkeypatch.setattr(Solver, "_Solver__branch", checked_branch)
+    make_solver(problem, pipeline=pipeline, deterministic=deterministic).solve()
+    assert any(closed)
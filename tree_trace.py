@@ -0,0 +1,13 @@
+import json
+
+
+class TraceWriter:
+    def __init__(self, path: str, buffer_size: int = 1 << 20) -> None:
+        self.file = open(path, "w", buffering=buffer_size)
+
+    def write(self, event: str, **fields) -> None:
+        fields["event"] = event
+        self.file.write(json.dumps(fields, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        self.file.close()